@@ -1,29 +1,52 @@
 """eMS Home integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
 
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.core import HomeAssistant
 from homeassistant.exceptions import ConfigEntryNotReady
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from homeassistant.helpers.storage import Store
 
-from .ems_home_api import EMSHomeHTTP
+from .capture import CaptureWriter
 from .const import (
+    CAPTURE_DIR,
+    CONF_CAPTURE_FRAMES,
     CONF_HOST,
     CONF_PASSWORD,
     CONF_PORT,
     CONF_SCAN_INTERVAL,
+    CONF_WS_UPDATE_INTERVAL,
+    DATA_CONNECT_TASK,
     DATA_COORDINATOR,
+    DATA_FLEET,
     DEFAULT_PORT,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_WS_UPDATE_INTERVAL,
     DOMAIN,
 )
 from .coordinator import EMSHomeCoordinator
+from .fleet import EMSHomeFleet
 
 _LOGGER = logging.getLogger(__name__)
 
 PLATFORMS = ["sensor", "select", "number"]
 
+STORAGE_VERSION = 1
+
+
+def _energy_store_key(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}.energy"
+
+
+def _token_store_key(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}.token"
+
+
+def _snapshot_store_key(entry: ConfigEntry) -> str:
+    return f"{DOMAIN}.{entry.entry_id}.snapshot"
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -35,48 +58,110 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         CONF_SCAN_INTERVAL,
         entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
     )
+    ws_interval = entry.options.get(
+        CONF_WS_UPDATE_INTERVAL, DEFAULT_WS_UPDATE_INTERVAL
+    )
 
     _LOGGER.info(
         "Setting up eMS Home: host=%s port=%d interval=%ds",
         host, port, interval,
     )
 
-    client = EMSHomeHTTP(
-        host, password, port=port,
-        use_https=(port == 443),
-        verify_ssl=False,
+    # All hubs share one connection pool, request/handshake caps and a
+    # staggered poll schedule
+    domain_data = hass.data.setdefault(DOMAIN, {})
+    fleet: EMSHomeFleet = domain_data.get(DATA_FLEET)
+    if fleet is None:
+        fleet = domain_data[DATA_FLEET] = EMSHomeFleet(
+            async_get_clientsession(hass, verify_ssl=False)
+        )
+    poll_phase = fleet.join(entry.entry_id)
+    client = fleet.create_client(host, password, port=port)
+
+    # Reuse the token from the last run; the password grant is only needed
+    # when there is none or the device rejects it (401 -> login)
+    token_store = Store(hass, STORAGE_VERSION, _token_store_key(entry))
+    client.add_token_listener(
+        lambda _token: hass.async_create_task(token_store.async_save(client.token_data()))
     )
-
-    try:
-        await hass.async_add_executor_job(client.login)
-        _LOGGER.info("eMS Home login successful for %s:%d", host, port)
-    except Exception as exc:
-        _LOGGER.error("eMS Home login failed for %s:%d – %s", host, port, exc)
-        raise ConfigEntryNotReady(
-            f"Cannot connect to eMS Home at {host}:{port} – {exc}"
-        ) from exc
-
-    coordinator = EMSHomeCoordinator(hass, client, interval)
-
-    try:
-        await coordinator.async_config_entry_first_refresh()
-    except Exception as exc:
-        _LOGGER.error("eMS Home first refresh failed: %s", exc)
-        raise
-
-    hass.data.setdefault(DOMAIN, {})[entry.entry_id] = {
+    if client.restore_token(await token_store.async_load()):
+        _LOGGER.debug("Reusing saved eMS Home token for %s:%d", host, port)
+
+    capture = None
+    if entry.options.get(CONF_CAPTURE_FRAMES, False):
+        capture = CaptureWriter(hass.config.path(CAPTURE_DIR, entry.entry_id))
+        _LOGGER.info("Capturing raw WebSocket frames to %s", capture.directory)
+
+    coordinator = EMSHomeCoordinator(
+        hass, client, interval, ws_update_interval=ws_interval,
+        energy_store=Store(hass, STORAGE_VERSION, _energy_store_key(entry)),
+        capture=capture,
+        snapshot_store=Store(hass, STORAGE_VERSION, _snapshot_store_key(entry)),
+        fleet=fleet,
+        poll_phase=poll_phase,
+    )
+    await coordinator.async_restore_energy()
+
+    # Warm start: entities come up with the last run's values (marked stale)
+    # while login, the first poll and the WebSockets run in the background.
+    # Without a snapshot (first setup) the entry waits for real data.
+    warm = await coordinator.async_restore_snapshot()
+    if not warm:
+        if client.token is None:
+            try:
+                await client.login()
+                _LOGGER.info("eMS Home login successful for %s:%d", host, port)
+            except Exception as exc:
+                _LOGGER.error("eMS Home login failed for %s:%d – %s", host, port, exc)
+                _leave_fleet(hass, entry)
+                raise ConfigEntryNotReady(
+                    f"Cannot connect to eMS Home at {host}:{port} – {exc}"
+                ) from exc
+        try:
+            await coordinator.async_config_entry_first_refresh()
+        except Exception as exc:
+            _LOGGER.error("eMS Home first refresh failed: %s", exc)
+            _leave_fleet(hass, entry)
+            raise
+
+    entry_data = domain_data[entry.entry_id] = {
         DATA_COORDINATOR: coordinator,
     }
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
-    await coordinator.async_start_websocket()
-
     entry.async_on_unload(entry.add_update_listener(_async_update_listener))
 
+    if warm:
+        _LOGGER.debug("eMS Home started from saved snapshot, connecting in background")
+        entry_data[DATA_CONNECT_TASK] = entry.async_create_background_task(
+            hass, _async_connect(coordinator), f"{DOMAIN}_connect_{entry.entry_id}"
+        )
+    else:
+        await _async_connect(coordinator, refresh=False)
+
     _LOGGER.info("eMS Home setup complete for %s:%d", host, port)
     return True
 
 
+async def _async_connect(coordinator: EMSHomeCoordinator, refresh: bool = True) -> None:
+    """Poll (logging in on demand), then start token renewal and WebSockets.
+
+    A failed poll leaves the entities unavailable and the coordinator
+    retries on its schedule; the streams start on the first token.
+    """
+    if refresh:
+        await coordinator.async_refresh()
+    coordinator.client.start_token_refresh()
+    await coordinator.async_start_websocket()
+
+
+def _leave_fleet(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the entry's hub from the fleet, dropping the fleet with the last one."""
+    domain_data = hass.data[DOMAIN]
+    if domain_data[DATA_FLEET].leave(entry.entry_id):
+        domain_data.pop(DATA_FLEET)
+
+
 async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> None:
     """Reload the entry when options change."""
     await hass.config_entries.async_reload(entry.entry_id)
@@ -84,10 +169,28 @@ async def _async_update_listener(hass: HomeAssistant, entry: ConfigEntry) -> Non
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
-    coordinator: EMSHomeCoordinator = hass.data[DOMAIN][entry.entry_id][DATA_COORDINATOR]
+    entry_data = hass.data[DOMAIN][entry.entry_id]
+    coordinator: EMSHomeCoordinator = entry_data[DATA_COORDINATOR]
+    # A warm connect still running would start streams or token renewal
+    # after they have been stopped below
+    connect_task = entry_data.get(DATA_CONNECT_TASK)
+    if connect_task is not None:
+        connect_task.cancel()
+        await asyncio.gather(connect_task, return_exceptions=True)
     await coordinator.async_stop_websocket()
+    await coordinator.async_flush_charge_mode()
+    await coordinator.async_save_energy()
+    await coordinator.async_save_snapshot()
+    await coordinator.client.close()
 
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
     if unload_ok:
         hass.data[DOMAIN].pop(entry.entry_id)
+        _leave_fleet(hass, entry)
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Delete the stored token, energy totals and snapshot of a removed entry."""
+    for key in (_token_store_key(entry), _energy_store_key(entry), _snapshot_store_key(entry)):
+        await Store(hass, STORAGE_VERSION, key).async_remove()
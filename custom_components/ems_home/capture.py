@@ -0,0 +1,308 @@
+"""
+eMS Home – append-only capture log of raw WebSocket payloads.
+
+Opt-in recorder used to reproduce decoder bugs and to replay real traffic
+in benchmarks.  Frames are buffered on the event loop and written in
+batches from an executor thread into rotating segment files:
+
+    <dir>/<first_ts_ns>.emscap   records, each
+                                 <d timestamp><B name_len><I payload_len>
+                                 followed by the stream name and payload
+    <dir>/<first_ts_ns>.emsidx   one <d timestamp><Q offset> entry per record
+
+Segments are read sequentially with iter_capture(), or opened with
+CaptureSegment, which memory-maps the data and index for O(log n) seeks
+by time.
+"""
+from __future__ import annotations
+
+import asyncio
+import logging
+from concurrent.futures import ThreadPoolExecutor
+import mmap
+import os
+import struct
+import time
+from bisect import bisect_left
+from typing import Iterator, NamedTuple, Optional
+
+_LOGGER = logging.getLogger(__name__)
+
+SEGMENT_SUFFIX = ".emscap"
+INDEX_SUFFIX   = ".emsidx"
+
+_RECORD = struct.Struct("<dBI")
+_INDEX  = struct.Struct("<dQ")
+
+DEFAULT_SEGMENT_BYTES = 8 * 1024 * 1024
+DEFAULT_MAX_BYTES     = 256 * 1024 * 1024
+DEFAULT_RETENTION     = 7 * 24 * 3600.0     # seconds
+DEFAULT_MAX_PENDING   = 4 * 1024 * 1024     # bytes buffered between flushes
+FLUSH_INTERVAL        = 1.0                 # seconds
+
+
+class CaptureRecord(NamedTuple):
+    timestamp: float
+    stream: str
+    payload: bytes
+
+
+def _segment_paths(directory: str) -> list[str]:
+    """Segment files in *directory*, oldest first."""
+    try:
+        names = os.listdir(directory)
+    except FileNotFoundError:
+        return []
+    segments = [n for n in names if n.endswith(SEGMENT_SUFFIX)]
+    segments.sort(key=lambda n: int(n[: -len(SEGMENT_SUFFIX)]))
+    return [os.path.join(directory, n) for n in segments]
+
+
+def _index_path(segment_path: str) -> str:
+    return segment_path[: -len(SEGMENT_SUFFIX)] + INDEX_SUFFIX
+
+
+# ---------------------------------------------------------------------------
+# Writer
+# ---------------------------------------------------------------------------
+
+class CaptureWriter:
+    """Batching, size-capped, segment-rotating capture log writer.
+
+    append() only queues bytes on the event loop; a background task hands
+    each batch to a single-thread executor, so batches and the final close
+    never overlap.  If the device outpaces the disk, frames beyond
+    *max_pending* bytes are dropped and counted.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        segment_bytes: int = DEFAULT_SEGMENT_BYTES,
+        max_bytes: int = DEFAULT_MAX_BYTES,
+        retention: float = DEFAULT_RETENTION,
+        max_pending: int = DEFAULT_MAX_PENDING,
+    ) -> None:
+        self._dir = directory
+        self._segment_bytes = segment_bytes
+        self._max_bytes = max_bytes
+        self._retention = retention
+        self._max_pending = max_pending
+        self._pending: list[tuple[float, bytes, bytes]] = []
+        self._pending_bytes = 0
+        self._task: Optional[asyncio.Task] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        # Only touched from the executor thread
+        self._segment = None
+        self._index = None
+        self._segment_size = 0
+        self.records = 0
+        self.dropped = 0
+
+    @property
+    def directory(self) -> str:
+        return self._dir
+
+    def append(self, stream: str, payload: bytes) -> None:
+        size = _RECORD.size + len(stream) + len(payload)
+        if self._pending_bytes + size > self._max_pending:
+            self.dropped += 1
+            return
+        self._pending.append((time.time(), stream.encode(), bytes(payload)))
+        self._pending_bytes += size
+
+    def as_dict(self) -> dict:
+        return {
+            "directory": self._dir,
+            "records": self.records,
+            "dropped": self.dropped,
+            "pending_bytes": self._pending_bytes,
+        }
+
+    async def start(self) -> None:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(1, thread_name_prefix="ems_home_capture")
+        if self._task is None:
+            self._task = asyncio.create_task(self._flush_loop(), name="ems_home_capture")
+
+    async def stop(self) -> None:
+        """Write what is pending and close the segment; never raises OSError."""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        if self._executor is None:
+            return
+        try:
+            # Queued behind a batch the flush loop may have left running
+            await self._flush()
+        except OSError as exc:
+            _LOGGER.warning("Frame capture write failed: %s", exc)
+        try:
+            await self._run(self._close_segment)
+        except OSError as exc:
+            _LOGGER.warning("Closing frame capture failed: %s", exc)
+        self._executor.shutdown(wait=False)
+        self._executor = None
+
+    async def _flush_loop(self) -> None:
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL)
+            try:
+                await self._flush()
+            except OSError as exc:
+                _LOGGER.warning("Frame capture write failed: %s", exc)
+            except Exception:
+                _LOGGER.exception("Frame capture write failed")
+
+    async def _flush(self) -> None:
+        if not self._pending:
+            return
+        batch, self._pending, self._pending_bytes = self._pending, [], 0
+        await self._run(self._write_batch, batch)
+
+    async def _run(self, fn, *args) -> None:
+        # Shielded: cancelling the caller must not drop a queued batch
+        fut = asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+        await asyncio.shield(fut)
+
+    # -- executor side ----------------------------------------------------
+
+    def _write_batch(self, batch: list[tuple[float, bytes, bytes]]) -> None:
+        for ts, name, payload in batch:
+            if self._segment is None or self._segment_size >= self._segment_bytes:
+                self._rotate(ts)
+            offset = self._segment_size
+            self._segment.write(_RECORD.pack(ts, len(name), len(payload)))
+            self._segment.write(name)
+            self._segment.write(payload)
+            self._index.write(_INDEX.pack(ts, offset))
+            self._segment_size += _RECORD.size + len(name) + len(payload)
+            self.records += 1
+        self._segment.flush()
+        self._index.flush()
+
+    def _rotate(self, ts: float) -> None:
+        self._close_segment()
+        os.makedirs(self._dir, exist_ok=True)
+        base = os.path.join(self._dir, str(int(ts * 1e9)))
+        self._segment = open(base + SEGMENT_SUFFIX, "ab")
+        self._index = open(base + INDEX_SUFFIX, "ab")
+        self._segment_size = self._segment.tell()
+        self._enforce_retention(keep=base + SEGMENT_SUFFIX)
+
+    def _close_segment(self) -> None:
+        for f in (self._segment, self._index):
+            if f is not None:
+                f.close()
+        self._segment = self._index = None
+
+    def _enforce_retention(self, keep: str) -> None:
+        segments = [p for p in _segment_paths(self._dir) if p != keep]
+        cutoff = time.time() - self._retention
+        total = sum(os.path.getsize(p) for p in segments)
+        for path in segments:
+            first_ts = int(os.path.basename(path)[: -len(SEGMENT_SUFFIX)]) / 1e9
+            if total <= self._max_bytes and first_ts >= cutoff:
+                break
+            total -= os.path.getsize(path)
+            for p in (path, _index_path(path)):
+                try:
+                    os.remove(p)
+                except FileNotFoundError:
+                    pass
+
+
+# ---------------------------------------------------------------------------
+# Readers
+# ---------------------------------------------------------------------------
+
+def _iter_records(buf, start: int = 0) -> Iterator[CaptureRecord]:
+    pos, end = start, len(buf)
+    header = _RECORD.size
+    while pos + header <= end:
+        ts, name_len, length = _RECORD.unpack_from(buf, pos)
+        pos += header
+        if pos + name_len + length > end:
+            return  # truncated tail of a segment still being written
+        name = bytes(buf[pos:pos + name_len]).decode()
+        pos += name_len
+        yield CaptureRecord(ts, name, bytes(buf[pos:pos + length]))
+        pos += length
+
+
+class CaptureSegment:
+    """Memory-mapped view of one segment and its index."""
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._files = []
+        self._data = self._map(path)
+        idx_path = _index_path(path)
+        self._idx = self._map(idx_path) if os.path.exists(idx_path) else b""
+        self._count = len(self._idx) // _INDEX.size
+
+    def _map(self, path: str):
+        f = open(path, "rb")
+        self._files.append(f)
+        if os.fstat(f.fileno()).st_size == 0:
+            return b""
+        return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    def __len__(self) -> int:
+        return self._count
+
+    def _index_entry(self, i: int) -> tuple[float, int]:
+        return _INDEX.unpack_from(self._idx, i * _INDEX.size)
+
+    def offset_for(self, timestamp: float) -> int:
+        """Byte offset of the first record at or after *timestamp*."""
+        lo = bisect_left(
+            range(self._count), timestamp, key=lambda i: self._index_entry(i)[0]
+        )
+        return self._index_entry(lo)[1] if lo < self._count else len(self._data)
+
+    def records(self, since: Optional[float] = None) -> Iterator[CaptureRecord]:
+        if since is None:
+            return _iter_records(self._data)
+        if not self._count:
+            # No index (e.g. copied without it): fall back to a linear scan
+            return (r for r in _iter_records(self._data) if r.timestamp >= since)
+        return _iter_records(self._data, self.offset_for(since))
+
+    def close(self) -> None:
+        for m in (self._data, self._idx):
+            if isinstance(m, mmap.mmap):
+                m.close()
+        for f in self._files:
+            f.close()
+
+    def __enter__(self) -> "CaptureSegment":
+        return self
+
+    def __exit__(self, *_) -> None:
+        self.close()
+
+
+def iter_capture(
+    directory: str,
+    start: Optional[float] = None,
+    end: Optional[float] = None,
+    stream: Optional[str] = None,
+) -> Iterator[CaptureRecord]:
+    """Yield records from all segments in time order, optionally filtered."""
+    paths = _segment_paths(directory)
+    if start is not None:
+        # Skip segments that end before *start* (the next one starts after it)
+        firsts = [int(os.path.basename(p)[: -len(SEGMENT_SUFFIX)]) / 1e9 for p in paths]
+        paths = paths[max(bisect_left(firsts, start) - 1, 0):]
+    for path in paths:
+        with CaptureSegment(path) as seg:
+            for rec in seg.records(since=start):
+                if end is not None and rec.timestamp > end:
+                    return
+                if stream is None or rec.stream == stream:
+                    yield rec
@@ -4,27 +4,36 @@ from __future__ import annotations
 import voluptuous as vol
 
 from homeassistant import config_entries
-from homeassistant.core import callback
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.data_entry_flow import FlowResult
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
 
 from .const import (
+    CONF_CAPTURE_FRAMES,
     CONF_HOST,
     CONF_PASSWORD,
     CONF_PORT,
     CONF_SCAN_INTERVAL,
+    CONF_WS_UPDATE_INTERVAL,
     DEFAULT_PORT,
     DEFAULT_SCAN_INTERVAL,
+    DEFAULT_WS_UPDATE_INTERVAL,
     DOMAIN,
 )
 
 
-def _try_login(host: str, password: str, port: int) -> str | None:
+async def _try_login(
+    hass: HomeAssistant, host: str, password: str, port: int
+) -> str | None:
     """Attempt to authenticate. Returns None on success, or an error key."""
     try:
-        from .ems_home_api import EMSHomeHTTP
-        ems = EMSHomeHTTP(host, password, port=port, use_https=(port == 443), verify_ssl=False)
-        ems.login()
-        ems.logout()
+        from .ems_home_api import EMSHomeAsyncHTTP
+        ems = EMSHomeAsyncHTTP(
+            host, password, port=port, use_https=(port == 443), verify_ssl=False,
+            session=async_get_clientsession(hass, verify_ssl=False),
+        )
+        await ems.login()
+        await ems.close()
         return None
     except Exception as exc:
         msg = str(exc).lower()
@@ -51,9 +60,7 @@ class EMSHomeConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             await self.async_set_unique_id(f"{host}:{port}")
             self._abort_if_unique_id_configured()
 
-            error = await self.hass.async_add_executor_job(
-                _try_login, host, password, port
-            )
+            error = await _try_login(self.hass, host, password, port)
             if error is None:
                 return self.async_create_entry(
                     title=f"eMS Home ({host})",
@@ -107,9 +114,7 @@ class EMSHomeOptionsFlow(config_entries.OptionsFlow):
             password = user_input[CONF_PASSWORD]
             port     = user_input.get(CONF_PORT, DEFAULT_PORT)
 
-            error = await self.hass.async_add_executor_job(
-                _try_login, host, password, port
-            )
+            error = await _try_login(self.hass, host, password, port)
             if error is None:
                 # Also update the config entry data so the coordinator picks up changes
                 self.hass.config_entries.async_update_entry(
@@ -123,7 +128,15 @@ class EMSHomeOptionsFlow(config_entries.OptionsFlow):
                 )
                 return self.async_create_entry(
                     title="",
-                    data={CONF_SCAN_INTERVAL: user_input.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL)},
+                    data={
+                        CONF_SCAN_INTERVAL: user_input.get(
+                            CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL
+                        ),
+                        CONF_WS_UPDATE_INTERVAL: user_input.get(
+                            CONF_WS_UPDATE_INTERVAL, DEFAULT_WS_UPDATE_INTERVAL
+                        ),
+                        CONF_CAPTURE_FRAMES: user_input.get(CONF_CAPTURE_FRAMES, False),
+                    },
                 )
             errors["base"] = error
 
@@ -134,6 +147,10 @@ class EMSHomeOptionsFlow(config_entries.OptionsFlow):
             CONF_SCAN_INTERVAL,
             self._config_entry.data.get(CONF_SCAN_INTERVAL, DEFAULT_SCAN_INTERVAL),
         )
+        current_ws_interval = self._config_entry.options.get(
+            CONF_WS_UPDATE_INTERVAL, DEFAULT_WS_UPDATE_INTERVAL
+        )
+        current_capture = self._config_entry.options.get(CONF_CAPTURE_FRAMES, False)
 
         schema = vol.Schema(
             {
@@ -143,6 +160,10 @@ class EMSHomeOptionsFlow(config_entries.OptionsFlow):
                 vol.Optional(CONF_SCAN_INTERVAL, default=current_interval): vol.All(
                     int, vol.Range(min=3, max=300)
                 ),
+                vol.Optional(
+                    CONF_WS_UPDATE_INTERVAL, default=current_ws_interval
+                ): vol.All(vol.Coerce(float), vol.Range(min=0, max=60)),
+                vol.Optional(CONF_CAPTURE_FRAMES, default=current_capture): bool,
             }
         )
 
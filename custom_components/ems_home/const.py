@@ -3,14 +3,26 @@
 DOMAIN = "ems_home"
 
 # Config entry keys
-CONF_HOST           = "host"
-CONF_PASSWORD       = "password"
-CONF_PORT           = "port"
-CONF_SCAN_INTERVAL  = "scan_interval"
+CONF_HOST               = "host"
+CONF_PASSWORD           = "password"
+CONF_PORT               = "port"
+CONF_SCAN_INTERVAL      = "scan_interval"
+CONF_WS_UPDATE_INTERVAL = "ws_update_interval"
+CONF_CAPTURE_FRAMES     = "capture_frames"
 
 # Defaults
-DEFAULT_PORT          = 80
-DEFAULT_SCAN_INTERVAL = 5    # seconds
+DEFAULT_PORT               = 80
+DEFAULT_SCAN_INTERVAL      = 5    # seconds
+DEFAULT_WS_UPDATE_INTERVAL = 1.0  # min. seconds between real-time updates per stream
+
+# Raw WS frame captures go to <config>/ems_home_capture/<entry_id>/
+CAPTURE_DIR = "ems_home_capture"
 
 # Coordinator update key stored in hass.data
 DATA_COORDINATOR = "coordinator"
+
+# Background connect task of a warm-started entry, stored next to it
+DATA_CONNECT_TASK = "connect_task"
+
+# Key of the EMSHomeFleet shared by all entries, stored in hass.data[DOMAIN]
+DATA_FLEET = "fleet"
@@ -1,31 +1,192 @@
 """DataUpdateCoordinator for eMS Home."""
 from __future__ import annotations
 
+import asyncio
 import logging
 import time as _time
 from datetime import timedelta
-from dataclasses import dataclass
-from typing import Optional
+from dataclasses import asdict, dataclass, replace
+from typing import Any, Callable, Optional
 
-from homeassistant.core import HomeAssistant, callback
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.helpers.event import async_call_later
+from homeassistant.helpers.storage import Store
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
 
-from .ems_home_api import EMSHomeHTTP, DeviceStatus, EMobilityState, ChargeModeConfig
-from .smart_meter_ws import SmartMeterReading, SmartMeterWebSocket
-from .evse_ws import EVSEReading, EVSEWebSocket
-from .const import DOMAIN
+from .ems_home_api import (
+    EMSHomeAsyncHTTP, DeviceStatus, EMobilityState, ChargeModeConfig, PhaseValues,
+)
+from .smart_meter_ws import WS_PATH, SmartMeterReading, decode_smart_meter_frame
+from .evse_ws import EVSE_ACTIVE_STATUSES, WS_EVSE_PATH, EVSEReading, decode_evse_frame
+from .ws_stream import StreamStats, WSStreamManager
+from .history import SmartMeterHistory
+from .energy import EnergyIntegrator, EnergyTotals
+from .capture import CaptureWriter
+from .metrics import EMSHomeMetrics
+from .fleet import EMSHomeFleet, phased_interval
+from .const import DEFAULT_WS_UPDATE_INTERVAL, DOMAIN
 
 _LOGGER = logging.getLogger(__name__)
 
-
-@dataclass
+# Integrated energy totals are persisted at most this often (seconds)
+ENERGY_SAVE_INTERVAL = 60.0
+
+# The last polled endpoint values are persisted at most this often
+# (seconds), so a restart, even after a crash, can show them before the
+# device answers again
+SNAPSHOT_SAVE_INTERVAL = 300.0
+
+# WebSocket readings older than this (seconds) are left out of snapshots
+STREAM_MAX_AGE = 15.0
+
+# While the EVSE stream reports an idle wallbox the HTTP poll backs off to
+# this interval (seconds); it returns to scan_interval when a session is
+# active and for TRANSITION_HOLD seconds after any EVSE status change.
+IDLE_POLL_INTERVAL = 120.0
+TRANSITION_HOLD = 60.0
+
+# Minimum age (seconds) before an endpoint is fetched again; until then the
+# cached value is reused.  Live power is fetched on every poll, device
+# health changes slowly and the charge mode only when someone writes it
+# (our own writes update the cache directly).
+ENDPOINT_INTERVALS: dict[str, float] = {
+    "device_status":    60.0,
+    "emobility_state":   0.0,
+    "charge_mode":     300.0,
+}
+
+# E-mobility state interval (seconds) while the EVSE stream supplies the
+# charging power; HTTP is then only needed for curtailment/overload data
+PUSHED_EMOBILITY_INTERVAL = 60.0
+
+# Charge mode changes are sent once no further change arrived for this long
+# (seconds), so a slider drag or a quick sequence of selections becomes a
+# single PUT
+CHARGE_MODE_WRITE_DELAY = 1.0
+
+# Per-endpoint timeouts (seconds) for the concurrent HTTP poll
+ENDPOINT_TIMEOUTS: dict[str, float] = {
+    "device_status":   6.0,
+    "emobility_state": 4.0,
+    "charge_mode":     6.0,
+}
+
+
+@dataclass(frozen=True)
 class EMSHomeData:
-    """All data available to sensor / select entities."""
+    """Immutable snapshot of all data available to sensor / select entities.
+
+    A new instance is published for every HTTP poll and every (throttled)
+    WebSocket update.  WS readings are already filtered for freshness, so
+    entities only read from it and never touch the coordinator's state.
+    When a fresh EVSE reading carries power channels, its charging power
+    replaces the polled value in emobility_state.  ``stale`` is set while
+    the HTTP values are still the ones restored from the last run.
+    """
     device_status:   DeviceStatus
     emobility_state: EMobilityState
     charge_mode:     ChargeModeConfig
     smart_meter: Optional[SmartMeterReading] = None
     evse: Optional[EVSEReading] = None
+    ev_charging_state: str = "idle"
+    energy: Optional[EnergyTotals] = None
+    stale: bool = False
+
+    @classmethod
+    def build(
+        cls,
+        device_status: DeviceStatus,
+        emobility_state: EMobilityState,
+        charge_mode: ChargeModeConfig,
+        smart_meter: Optional[SmartMeterReading],
+        evse: Optional[EVSEReading],
+        energy: Optional[EnergyTotals] = None,
+        stale: bool = False,
+    ) -> "EMSHomeData":
+        if evse is not None and evse.has_power:
+            emobility_state = replace(
+                emobility_state,
+                ev_charging_power=PhaseValues(   # W -> mW as reported by HTTP
+                    evse.power_total * 1000,
+                    evse.power_l1 * 1000,
+                    evse.power_l2 * 1000,
+                    evse.power_l3 * 1000,
+                ),
+            )
+        if charge_mode.mode == "lock":
+            ev_charging_state = "locked"
+        elif emobility_state.ev_charging_power.total > 0:
+            ev_charging_state = "charging"
+        else:
+            ev_charging_state = "idle"
+        return cls(
+            device_status=device_status,
+            emobility_state=emobility_state,
+            charge_mode=charge_mode,
+            smart_meter=smart_meter,
+            evse=evse,
+            ev_charging_state=ev_charging_state,
+            energy=energy,
+            stale=stale,
+        )
+
+
+def _endpoints_to_dict(cache: dict[str, tuple[float, Any]]) -> dict[str, Any]:
+    """JSON-serialisable copy of the polled endpoint values."""
+    return {name: asdict(value) for name, (_, value) in cache.items()}
+
+
+def _endpoints_from_dict(data: dict[str, Any]) -> dict[str, Any]:
+    """Inverse of _endpoints_to_dict; raises on a malformed snapshot."""
+    emobility = data["emobility_state"]
+    return {
+        "device_status": DeviceStatus(**data["device_status"]),
+        "emobility_state": EMobilityState(
+            PhaseValues(**emobility["ev_charging_power"]),
+            PhaseValues(**emobility["curtailment_setpoint"]),
+            emobility["overload_protection_active"],
+        ),
+        "charge_mode": ChargeModeConfig(**data["charge_mode"]),
+    }
+
+
+class _PublishThrottle:
+    """Coalesce bursts of stream updates into at most one publish per interval.
+
+    The caller stores the newest value before signalling, so whatever is
+    current when the window closes is what gets published (latest wins).
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, interval: float, publish: Callable[[], None]
+    ) -> None:
+        self._hass = hass
+        self._interval = interval
+        self._publish = publish
+        self._last: float = 0.0
+        self._unsub: Optional[CALLBACK_TYPE] = None
+
+    @callback
+    def signal(self) -> None:
+        if self._unsub is not None:
+            return  # a publish is already scheduled for this window
+        wait = self._interval - (_time.monotonic() - self._last)
+        if wait <= 0:
+            self._fire()
+        else:
+            self._unsub = async_call_later(self._hass, wait, self._fire)
+
+    @callback
+    def _fire(self, _now=None) -> None:
+        self._unsub = None
+        self._last = _time.monotonic()
+        self._publish()
+
+    @callback
+    def cancel(self) -> None:
+        if self._unsub is not None:
+            self._unsub()
+            self._unsub = None
 
 
 class EMSHomeCoordinator(DataUpdateCoordinator[EMSHomeData]):
@@ -34,21 +195,83 @@ class EMSHomeCoordinator(DataUpdateCoordinator[EMSHomeData]):
     def __init__(
         self,
         hass: HomeAssistant,
-        client: EMSHomeHTTP,
+        client: EMSHomeAsyncHTTP,
         update_interval: int,
+        ws_update_interval: float = DEFAULT_WS_UPDATE_INTERVAL,
+        energy_store: Optional[Store] = None,
+        capture: Optional[CaptureWriter] = None,
+        snapshot_store: Optional[Store] = None,
+        fleet: Optional[EMSHomeFleet] = None,
+        poll_phase: float = 0.0,
     ) -> None:
         self.client = client
-        self._ws_client: Optional[SmartMeterWebSocket] = None
-        self._evse_ws_client: Optional[EVSEWebSocket] = None
+        self._fleet = fleet
+        # Fraction of the interval added once after the first poll, see
+        # EMSHomeFleet.join()
+        self._poll_phase = poll_phase
+        self._streams: Optional[WSStreamManager] = None
+        # Streams start on the first token if none is available yet
+        self._ws_wanted = False
+        self._unsub_token = client.add_token_listener(self._on_token_rotated)
+        self._capture = capture
         self._latest_smart_meter: Optional[SmartMeterReading] = None
         self._latest_evse: Optional[EVSEReading] = None
         self._poll_count: int = 0
+        # Adaptive poll interval, see _next_poll_interval()
+        self._fast_interval = timedelta(seconds=update_interval)
+        self._idle_interval = timedelta(seconds=max(IDLE_POLL_INTERVAL, update_interval))
+        self._evse_changed_at: float = 0.0
+        # Drops stream data from the snapshot at its freshness deadline
+        self._unsub_stream_expiry: Optional[CALLBACK_TYPE] = None
+        # Performance metrics shared with the HTTP client and the WS streams
+        if client.metrics is None:
+            client.metrics = EMSHomeMetrics()
+        self.metrics: EMSHomeMetrics = client.metrics
+        # Second-level smart meter history for diagnostics and control logic
+        self.smart_meter_history = SmartMeterHistory()
+        # kWh integrated from WS power, persisted per config entry
+        self.energy = EnergyIntegrator()
+        self._energy_store = energy_store
+        self._energy_saved_at: float = 0.0
+        # Last good value per endpoint: name -> (time.monotonic(), value)
+        self._endpoint_cache: dict[str, tuple[float, Any]] = {}
+        # Endpoint values of the last run, see async_restore_snapshot()
+        self._snapshot_store = snapshot_store
+        self._snapshot_saved_at = float("-inf")
+        self._has_polled = False
+        # HTTP models the last poll published, see _async_update_data()
+        self._polled_models: Optional[
+            tuple[DeviceStatus, EMobilityState, ChargeModeConfig]
+        ] = None
+        # Charge mode write queue, see async_set_charge_mode(): the newest
+        # requested (mode, min charging quota, min PV quota), the debounce
+        # timer, the task sending it and whether the next poll must re-read
+        # the charge mode to confirm a write
+        self._charge_mode_pending: Optional[tuple[str, Optional[int], int]] = None
+        self._unsub_charge_mode_write: Optional[CALLBACK_TYPE] = None
+        self._charge_mode_task: Optional[asyncio.Task] = None
+        self._charge_mode_writing = False
+        self._charge_mode_confirm = False
+        # Where each endpoint's data came from on the last poll: "fresh",
+        # "cached" (not due yet), "fallback" (fetch failed, last good value)
+        # or "default" (placeholder)
+        self.endpoint_sources: dict[str, str] = {}
+        # Each WS stream publishes to entities at most once per window
+        self._smart_meter_throttle = _PublishThrottle(
+            hass, ws_update_interval, self._publish_stream_update
+        )
+        self._evse_throttle = _PublishThrottle(
+            hass, ws_update_interval, self._publish_stream_update
+        )
 
+        # A poll whose HTTP models are unchanged returns the current snapshot
+        # itself, so Home Assistant finds it equal and notifies no entity
         super().__init__(
             hass,
             _LOGGER,
             name=DOMAIN,
-            update_interval=timedelta(seconds=update_interval),
+            update_interval=self._fast_interval,
+            always_update=False,
         )
 
     # ------------------------------------------------------------------
@@ -69,36 +292,72 @@ class EMSHomeCoordinator(DataUpdateCoordinator[EMSHomeData]):
     # ------------------------------------------------------------------
 
     async def async_start_websocket(self) -> None:
+        self._ws_wanted = True
+        if self._streams is not None:
+            return
         token = self.client.token
         if token is None:
-            _LOGGER.warning("Cannot start WebSockets – no token available")
+            _LOGGER.debug("No token yet – WebSockets start after the first login")
             return
 
         host, port = self._get_host_port()
 
-        # Smart Meter WS
-        self._ws_client = SmartMeterWebSocket(
-            host=host, token=token,
-            on_reading=self._on_smart_meter_reading, port=port,
+        if self._fleet is not None:
+            streams = self._fleet.create_streams(
+                host, port, token, recorder=self._capture, metrics=self.metrics
+            )
+        else:
+            streams = WSStreamManager(
+                host, port, token, recorder=self._capture, metrics=self.metrics
+            )
+        # Assigned before the first await so a concurrent start is a no-op
+        self._streams = streams
+        streams.register(
+            "smart_meter", WS_PATH,
+            decode_smart_meter_frame, self._on_smart_meter_reading,
         )
-        await self._ws_client.start()
-        _LOGGER.debug("Smart meter WebSocket started for %s:%s", host, port)
-
-        # EVSE WS
-        self._evse_ws_client = EVSEWebSocket(
-            host=host, token=token,
-            on_reading=self._on_evse_reading, port=port,
+        streams.register(
+            "evse", WS_EVSE_PATH,
+            decode_evse_frame, self._on_evse_reading,
         )
-        await self._evse_ws_client.start()
-        _LOGGER.debug("EVSE WebSocket started for %s:%s", host, port)
+        if self._capture is not None:
+            await self._capture.start()
+        await streams.start()
+        _LOGGER.debug("WebSocket streams started for %s:%s", host, port)
 
     async def async_stop_websocket(self) -> None:
-        if self._ws_client:
-            await self._ws_client.stop()
-            self._ws_client = None
-        if self._evse_ws_client:
-            await self._evse_ws_client.stop()
-            self._evse_ws_client = None
+        self._ws_wanted = False
+        if self._unsub_token is not None:
+            self._unsub_token()
+            self._unsub_token = None
+        self._smart_meter_throttle.cancel()
+        self._evse_throttle.cancel()
+        if self._unsub_stream_expiry is not None:
+            self._unsub_stream_expiry()
+            self._unsub_stream_expiry = None
+        if self._streams:
+            await self._streams.stop()
+            self._streams = None
+        if self._capture is not None:
+            await self._capture.stop()
+
+    @callback
+    def _on_token_rotated(self, token: str) -> None:
+        """Move the live streams onto a renewed access token."""
+        if self._streams is not None:
+            self.hass.async_create_task(self._streams.rotate_token(token))
+        elif self._ws_wanted:
+            self.hass.async_create_task(self.async_start_websocket())
+
+    @property
+    def capture(self) -> Optional[CaptureWriter]:
+        """The frame capture log, when enabled in the options."""
+        return self._capture
+
+    @property
+    def stream_stats(self) -> dict[str, StreamStats]:
+        """Per-stream connection state and counters, keyed by stream name."""
+        return self._streams.stats if self._streams else {}
 
     # ------------------------------------------------------------------
     # Smart Meter callbacks
@@ -106,17 +365,66 @@ class EMSHomeCoordinator(DataUpdateCoordinator[EMSHomeData]):
 
     @callback
     def _on_smart_meter_reading(self, reading: SmartMeterReading) -> None:
-        reading._received_at = _time.monotonic()
+        reading.received_at = _time.monotonic()
         self._latest_smart_meter = reading
+        self.smart_meter_history.append(reading)
+        self.energy.add(reading)
+        if self._energy_store is not None:
+            if reading.received_at - self._energy_saved_at >= ENERGY_SAVE_INTERVAL:
+                self._energy_saved_at = reading.received_at
+                self._energy_store.async_delay_save(self.energy.as_dict, 1)
         if self.data is not None:
-            self.data.smart_meter = reading
-            self.async_update_listeners()
+            self._smart_meter_throttle.signal()
+        self._watch_stream_expiry()
 
-    def get_fresh_smart_meter(self, max_age: float = 15.0):
+    def get_fresh_smart_meter(self, max_age: float = STREAM_MAX_AGE, now: Optional[float] = None):
         r = self._latest_smart_meter
         if r is None:
             return None
-        return r if (_time.monotonic() - getattr(r, "_received_at", 0.0)) <= max_age else None
+        if now is None:
+            now = _time.monotonic()
+        return r if (now - r.received_at) <= max_age else None
+
+    async def async_restore_energy(self) -> None:
+        """Load integrated energy totals saved by a previous run."""
+        if self._energy_store is not None:
+            self.energy.restore(await self._energy_store.async_load())
+            self._energy_saved_at = _time.monotonic()
+
+    async def async_save_energy(self) -> None:
+        if self._energy_store is not None:
+            await self._energy_store.async_save(self.energy.as_dict())
+
+    async def async_restore_snapshot(self) -> bool:
+        """Publish the endpoint values saved by the last run, marked stale.
+
+        They also serve as the fallback of each endpoint until its first
+        successful fetch.  Returns False when there is nothing usable.
+        """
+        if self._snapshot_store is None:
+            return False
+        stored = await self._snapshot_store.async_load()
+        if not stored:
+            return False
+        try:
+            values = _endpoints_from_dict(stored)
+        except (KeyError, TypeError) as exc:
+            _LOGGER.debug("Ignoring unusable eMS Home snapshot: %s", exc)
+            return False
+        # -inf: due on the first poll, but kept when that fetch fails
+        for name, value in values.items():
+            self._endpoint_cache[name] = (float("-inf"), value)
+        self.data = self._build_snapshot(
+            values["device_status"], values["emobility_state"], values["charge_mode"]
+        )
+        return True
+
+    def _snapshot_data(self) -> dict[str, Any]:
+        return _endpoints_to_dict(self._endpoint_cache)
+
+    async def async_save_snapshot(self) -> None:
+        if self._snapshot_store is not None and self._has_polled:
+            await self._snapshot_store.async_save(self._snapshot_data())
 
     # ------------------------------------------------------------------
     # EVSE callbacks
@@ -124,17 +432,199 @@ class EMSHomeCoordinator(DataUpdateCoordinator[EMSHomeData]):
 
     @callback
     def _on_evse_reading(self, reading: EVSEReading) -> None:
-        reading._received_at = _time.monotonic()
+        reading.received_at = _time.monotonic()
+        prev = self._latest_evse
         self._latest_evse = reading
+        if prev is not None and prev.evse_status != reading.evse_status:
+            # Session starting/ending: poll now and keep polling fast
+            _LOGGER.debug(
+                "EVSE status %s -> %s, refreshing", prev.status_text, reading.status_text
+            )
+            self._evse_changed_at = reading.received_at
+            self.hass.async_create_task(self.async_request_refresh())
         if self.data is not None:
-            self.data.evse = reading
-            self.async_update_listeners()
+            self._evse_throttle.signal()
+        self._watch_stream_expiry()
 
-    def get_fresh_evse(self, max_age: float = 15.0):
+    def get_fresh_evse(self, max_age: float = STREAM_MAX_AGE, now: Optional[float] = None):
         r = self._latest_evse
         if r is None:
             return None
-        return r if (_time.monotonic() - getattr(r, "_received_at", 0.0)) <= max_age else None
+        if now is None:
+            now = _time.monotonic()
+        return r if (now - r.received_at) <= max_age else None
+
+    # ------------------------------------------------------------------
+    # Stream freshness
+    # ------------------------------------------------------------------
+
+    @callback
+    def _watch_stream_expiry(self) -> None:
+        """Arm the freshness check; a no-op while one is pending."""
+        if self._unsub_stream_expiry is None:
+            self._unsub_stream_expiry = async_call_later(
+                self.hass, STREAM_MAX_AGE, self._on_stream_expiry
+            )
+
+    @callback
+    def _on_stream_expiry(self, _now=None) -> None:
+        """Drop readings past STREAM_MAX_AGE and leave the idle interval.
+
+        Without this a stream outage would keep its last values in the
+        snapshot until the next poll, up to IDLE_POLL_INTERVAL later.
+        """
+        self._unsub_stream_expiry = None
+        now = _time.monotonic()
+        data = self.data
+        if data is not None and (
+            (data.smart_meter is not None and self.get_fresh_smart_meter(now=now) is None)
+            or (data.evse is not None and self.get_fresh_evse(now=now) is None)
+        ):
+            self._publish_stream_update()
+            if self.update_interval != self._fast_interval:
+                _LOGGER.debug("Stream data expired, back to the fast poll interval")
+                self.update_interval = self._fast_interval
+                self.hass.async_create_task(self.async_request_refresh())
+
+        # Check again just after the next reading's deadline
+        deadlines = [
+            r.received_at + STREAM_MAX_AGE
+            for r in (self._latest_smart_meter, self._latest_evse)
+            if r is not None and r.received_at + STREAM_MAX_AGE >= now
+        ]
+        if deadlines:
+            self._unsub_stream_expiry = async_call_later(
+                self.hass, min(deadlines) - now + 0.1, self._on_stream_expiry
+            )
+
+    # ------------------------------------------------------------------
+    # Snapshot publishing
+    # ------------------------------------------------------------------
+
+    def _build_snapshot(
+        self,
+        device_status: DeviceStatus,
+        emobility_state: EMobilityState,
+        charge_mode: ChargeModeConfig,
+    ) -> EMSHomeData:
+        now = _time.monotonic()
+        return EMSHomeData.build(
+            device_status,
+            emobility_state,
+            charge_mode,
+            smart_meter=self.get_fresh_smart_meter(now=now),
+            evse=self.get_fresh_evse(now=now),
+            energy=self.energy.totals(),
+            stale=not self._has_polled,
+        )
+
+    def _polled_emobility_state(self, prev: EMSHomeData) -> EMobilityState:
+        """E-mobility state as last polled, without EVSE stream values merged in."""
+        entry = self._endpoint_cache.get("emobility_state")
+        return entry[1] if entry is not None else prev.emobility_state
+
+    @callback
+    def _publish_stream_update(self) -> None:
+        """Publish a new snapshot carrying the latest WS readings."""
+        prev = self.data
+        if prev is None:
+            return
+        data = self.data = self._build_snapshot(
+            prev.device_status, self._polled_emobility_state(prev), prev.charge_mode
+        )
+        self.async_update_listeners()
+        # Listeners write entity state synchronously, so this is frame to state
+        now = _time.monotonic()
+        if data.smart_meter is not None:
+            self.metrics.record_published("smart_meter", data.smart_meter.received_at, now)
+        if data.evse is not None:
+            self.metrics.record_published("evse", data.evse.received_at, now)
+
+    # ------------------------------------------------------------------
+    # Charge mode writes
+    # ------------------------------------------------------------------
+
+    async def async_set_charge_mode(
+        self,
+        mode: str,
+        min_charging_power_quota: Optional[int] = None,
+        min_pv_power_quota: int = 0,
+    ) -> ChargeModeConfig:
+        """Queue a charge mode write and publish it optimistically.
+
+        Changes arriving within CHARGE_MODE_WRITE_DELAY of each other are
+        merged (the newest wins) into one PUT without a read-back; the
+        next scheduled poll re-reads the charge mode to confirm it.
+        """
+        self._charge_mode_pending = (mode, min_charging_power_quota, min_pv_power_quota)
+        entry = self._endpoint_cache.get("charge_mode")
+        prev = entry[1] if entry is not None else (
+            self.data.charge_mode if self.data is not None
+            else ChargeModeConfig("unknown", 0, 0, 0, 0)
+        )
+        charge_mode = replace(
+            prev,
+            mode=mode,
+            min_charging_power_quota=min_charging_power_quota or 0,
+            min_pv_power_quota=min_pv_power_quota,
+        )
+        # Newer than any poll already in flight, which therefore discards
+        # its charge mode read (see _fetch_all)
+        self._endpoint_cache["charge_mode"] = (_time.monotonic(), charge_mode)
+        data = self.data
+        if data is not None:
+            self.data = self._build_snapshot(
+                data.device_status, self._polled_emobility_state(data), charge_mode
+            )
+            self.async_update_listeners()
+
+        if self._unsub_charge_mode_write is not None:
+            self._unsub_charge_mode_write()
+        self._unsub_charge_mode_write = async_call_later(
+            self.hass, CHARGE_MODE_WRITE_DELAY, self._flush_charge_mode
+        )
+        return charge_mode
+
+    @callback
+    def _flush_charge_mode(self, _now=None) -> None:
+        self._unsub_charge_mode_write = None
+        if self._charge_mode_writing:
+            return  # the running write sends the newer change when it is done
+        self._charge_mode_task = self.hass.async_create_task(
+            self._async_write_charge_mode()
+        )
+
+    async def _async_write_charge_mode(self) -> None:
+        pending, self._charge_mode_pending = self._charge_mode_pending, None
+        if pending is None:
+            return
+        mode, min_charging_power_quota, min_pv_power_quota = pending
+        self._charge_mode_writing = True
+        try:
+            await self.client.set_charge_mode(
+                mode,
+                min_charging_power_quota=min_charging_power_quota,
+                min_pv_power_quota=min_pv_power_quota,
+                read_back=False,
+            )
+            _LOGGER.debug("Charge mode set to %s", mode)
+        except Exception as exc:
+            # The confirming poll puts the device's actual value back
+            _LOGGER.warning("Setting charge mode %s failed: %s", mode, exc)
+        finally:
+            self._charge_mode_writing = False
+            self._charge_mode_confirm = True
+        if self._charge_mode_pending is not None and self._unsub_charge_mode_write is None:
+            self._flush_charge_mode()
+
+    async def async_flush_charge_mode(self) -> None:
+        """Send a queued charge mode change now instead of after the delay."""
+        if self._unsub_charge_mode_write is not None:
+            self._unsub_charge_mode_write()
+            self._unsub_charge_mode_write = None
+        if self._charge_mode_task is not None:
+            await self._charge_mode_task
+        await self._async_write_charge_mode()
 
     # ------------------------------------------------------------------
     # HTTP poll
@@ -144,13 +634,14 @@ class EMSHomeCoordinator(DataUpdateCoordinator[EMSHomeData]):
         self._poll_count += 1
         _LOGGER.debug("HTTP poll #%d starting", self._poll_count)
 
+        start = _time.monotonic()
         try:
-            device_status, emobility_state, charge_mode = (
-                await self.hass.async_add_executor_job(self._fetch_all)
-            )
+            device_status, emobility_state, charge_mode = await self._fetch_all()
         except Exception as exc:
             _LOGGER.warning("HTTP poll #%d failed: %s", self._poll_count, exc)
             raise UpdateFailed(f"Error communicating with eMS Home: {exc}") from exc
+        finally:
+            self.metrics.poll.add(_time.monotonic() - start)
 
         _LOGGER.debug(
             "HTTP poll #%d OK – charging=%.3f kW, mode=%s",
@@ -159,65 +650,121 @@ class EMSHomeCoordinator(DataUpdateCoordinator[EMSHomeData]):
             charge_mode.mode,
         )
 
-        return EMSHomeData(
-            device_status=device_status,
-            emobility_state=emobility_state,
-            charge_mode=charge_mode,
-            smart_meter=self._latest_smart_meter,
-            evse=self._latest_evse,
+        self._has_polled = True
+        if self._snapshot_store is not None:
+            # async_delay_save restarts its timer on every call, so a long
+            # delay would never elapse while polls keep coming
+            if start - self._snapshot_saved_at >= SNAPSHOT_SAVE_INTERVAL:
+                self._snapshot_saved_at = start
+                self._snapshot_store.async_delay_save(self._snapshot_data, 1)
+
+        interval = self._next_poll_interval(emobility_state)
+        if self._poll_phase:
+            interval = timedelta(
+                seconds=phased_interval(interval.total_seconds(), self._poll_phase)
+            )
+            self._poll_phase = 0.0
+        if interval != self.update_interval:
+            _LOGGER.debug("HTTP poll interval now %ss", interval.total_seconds())
+            self.update_interval = interval
+
+        # Unchanged responses and cached endpoints come back as the same
+        # model objects.  Stream readings and energy totals are published by
+        # the stream throttle, so they do not make an idle poll a change.
+        models = (device_status, emobility_state, charge_mode)
+        prev = self.data
+        if (
+            prev is not None
+            and not prev.stale
+            and self._polled_models is not None
+            and all(new is old for new, old in zip(models, self._polled_models))
+        ):
+            return prev
+        self._polled_models = models
+        return self._build_snapshot(device_status, emobility_state, charge_mode)
+
+    def _next_poll_interval(self, emobility_state: EMobilityState) -> timedelta:
+        """Poll fast while a session is active or changing, slowly when idle."""
+        evse = self.get_fresh_evse()
+        if evse is None:
+            return self._fast_interval  # no stream data: cannot tell idle from charging
+        if (
+            evse.evse_status in EVSE_ACTIVE_STATUSES
+            or emobility_state.ev_charging_power.total > 0
+            or _time.monotonic() - self._evse_changed_at < TRANSITION_HOLD
+        ):
+            return self._fast_interval
+        return self._idle_interval
+
+    async def _fetch_all(self):
+        fetchers = {
+            "device_status": self.client.get_device_status,
+            "emobility_state": self.client.get_emobility_state,
+            "charge_mode": self.client.get_charge_mode,
+        }
+        now = _time.monotonic()
+        cache = self._endpoint_cache
+        intervals = dict(ENDPOINT_INTERVALS)
+        evse = self.get_fresh_evse(now=now)
+        if evse is not None and evse.has_power:
+            intervals["emobility_state"] = PUSHED_EMOBILITY_INTERVAL
+        # A queued or running charge mode write is not read back until it
+        # has been sent, and is confirmed by the first poll after that
+        writing = self._charge_mode_pending is not None or self._charge_mode_writing
+        if self._charge_mode_confirm and not writing:
+            intervals["charge_mode"] = 0.0
+        due = [
+            name for name in fetchers
+            if (name not in cache or now - cache[name][0] >= intervals[name])
+            and not (name == "charge_mode" and writing)
+        ]
+
+        # Fetch due endpoints concurrently – if one fails, keep the others
+        results = await asyncio.gather(
+            *(self._fetch_endpoint(name, fetchers[name]) for name in due)
         )
 
-    def _fetch_all(self):
-        # Keep WS tokens in sync
-        token = self.client.token
-        if self._ws_client and token:
-            self._ws_client.update_token(token)
-        if self._evse_ws_client and token:
-            self._evse_ws_client.update_token(token)
-
-        # Fetch each endpoint independently – if one fails, try the others
-        device_status = None
-        emobility_state = None
-        charge_mode = None
-
-        try:
-            device_status = self.client.get_device_status()
-        except Exception as exc:
-            _LOGGER.warning("Failed to fetch device status: %s", exc)
-
-        try:
-            emobility_state = self.client.get_emobility_state()
-        except Exception as exc:
-            _LOGGER.warning("Failed to fetch e-mobility state: %s", exc)
-
-        try:
-            charge_mode = self.client.get_charge_mode()
-        except Exception as exc:
-            _LOGGER.warning("Failed to fetch charge mode: %s", exc)
-
-        # If all three failed, raise so the coordinator marks as unavailable
-        if device_status is None and emobility_state is None and charge_mode is None:
+        # Raise (entities unavailable) only when every endpoint was due and
+        # every fetch failed.  While any endpoint still has a cached value
+        # within its interval, failed endpoints fall back to their cache.
+        if len(due) == len(fetchers) and all(r is None for r in results):
             raise ConnectionError("All HTTP endpoints failed")
 
-        # Use previous data as fallback for individual failures
-        prev = self.data
-        if device_status is None and prev:
-            device_status = prev.device_status
-        if emobility_state is None and prev:
-            emobility_state = prev.emobility_state
-        if charge_mode is None and prev:
-            charge_mode = prev.charge_mode
-
-        # If we still have None (first poll, partial failure), create defaults
-        from .ems_home_api import PhaseValues
-        if device_status is None:
-            device_status = DeviceStatus("unknown", 0, 0, 1, 1, 1, 1, 1, 1)
-        if emobility_state is None:
-            emobility_state = EMobilityState(
+        sources: dict[str, str] = {name: "cached" for name in fetchers}
+        for name, value in zip(due, results):
+            if value is not None:
+                # A charge mode write during the poll is newer than our read
+                if name not in cache or cache[name][0] <= now:
+                    cache[name] = (now, value)
+                    if name == "charge_mode":
+                        self._charge_mode_confirm = False
+                sources[name] = "fresh"
+            else:
+                sources[name] = "fallback" if name in cache else "default"
+        self.endpoint_sources = sources
+
+        # Endpoints that have never succeeded (first poll) get placeholders
+        defaults = {
+            "device_status": DeviceStatus("unknown", 0, 0, 1, 1, 1, 1, 1, 1),
+            "emobility_state": EMobilityState(
                 PhaseValues(0, 0, 0, 0), PhaseValues(0, 0, 0, 0), False
-            )
-        if charge_mode is None:
-            charge_mode = ChargeModeConfig("unknown", 0, 0, 0, 0)
-
+            ),
+            "charge_mode": ChargeModeConfig("unknown", 0, 0, 0, 0),
+        }
+        device_status, emobility_state, charge_mode = (
+            cache[name][1] if name in cache else defaults[name] for name in fetchers
+        )
         return device_status, emobility_state, charge_mode
 
+    async def _fetch_endpoint(self, name: str, fetch):
+        """Run one endpoint fetch with its own timeout; return None on failure."""
+        try:
+            return await asyncio.wait_for(fetch(), ENDPOINT_TIMEOUTS[name])
+        except asyncio.TimeoutError:
+            _LOGGER.warning(
+                "Timed out fetching %s after %.1fs", name, ENDPOINT_TIMEOUTS[name]
+            )
+        except Exception as exc:
+            _LOGGER.warning("Failed to fetch %s: %s", name, exc)
+        return None
+
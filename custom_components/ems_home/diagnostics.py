@@ -0,0 +1,55 @@
+"""Diagnostics support for eMS Home."""
+from __future__ import annotations
+
+import time
+from dataclasses import asdict
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_PASSWORD, DATA_COORDINATOR, DOMAIN
+from .coordinator import EMSHomeCoordinator
+
+TO_REDACT = {CONF_PASSWORD}
+
+
+async def async_get_config_entry_diagnostics(
+    hass: HomeAssistant, entry: ConfigEntry
+) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: EMSHomeCoordinator = hass.data[DOMAIN][entry.entry_id][DATA_COORDINATOR]
+    now = time.monotonic()
+
+    streams = {}
+    for name, stats in coordinator.stream_stats.items():
+        info = asdict(stats)
+        # Monotonic timestamps mean nothing outside this process; report ages
+        for key, age_key in (
+            ("last_frame_at", "last_frame_age_s"),
+            ("connected_since", "connected_for_s"),
+        ):
+            value = info.pop(key)
+            info[age_key] = round(now - value, 1) if value else None
+        streams[name] = info
+
+    capture = coordinator.capture
+
+    return {
+        "entry": {
+            "data": async_redact_data(dict(entry.data), TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "last_update_success": coordinator.last_update_success,
+        "poll_interval_s": coordinator.update_interval.total_seconds(),
+        "endpoint_sources": coordinator.endpoint_sources,
+        "streams": streams,
+        "capture": capture.as_dict() if capture is not None else None,
+        "metrics": coordinator.metrics.as_dict(),
+        "energy": {
+            **coordinator.energy.as_dict(),
+            "skipped_gaps": coordinator.energy.skipped_gaps,
+        },
+        "smart_meter_history": coordinator.smart_meter_history.as_dict(),
+    }
@@ -6,12 +6,19 @@ Handles OAuth2 authentication and all HTTP endpoints.
 """
 from __future__ import annotations
 
+import asyncio
+import contextlib
+import json
+import logging
 import time
 from dataclasses import dataclass
-from typing import Optional
+from typing import Any, Callable, NamedTuple, Optional, TypeVar
 
-import requests
-from requests import Session
+import aiohttp
+
+from .metrics import EMSHomeMetrics
+
+_LOGGER = logging.getLogger(__name__)
 
 
 # ===========================================================================
@@ -143,8 +150,77 @@ class ChargeModeConfig:
 # HTTP client
 # ===========================================================================
 
-class EMSHomeHTTP:
-    """HTTP client for the eMS Home web interface with OAuth2 auth."""
+PATH_DEVICE_STATUS   = "/api/device-settings/devicestatus"
+PATH_EMOBILITY_STATE = "/api/e-mobility/state"
+PATH_CHARGE_MODE     = "/api/e-mobility/config/chargemode"
+
+_T = TypeVar("_T")
+
+# Tokens are renewed in the background once this fraction of their lifetime
+# has passed; a failed renewal is retried after TOKEN_RETRY_DELAY seconds.
+TOKEN_REFRESH_FRACTION = 0.8
+TOKEN_RETRY_DELAY = 60.0
+
+# A token is not renewed sooner than this (seconds) after it was issued,
+# whatever expires_in the device reports (0 would otherwise loop)
+TOKEN_MIN_REFRESH_DELAY = 60.0
+
+# A saved token is only reused if it stays valid at least this long (seconds)
+TOKEN_MIN_REMAINING = 300.0
+
+
+class _Response(NamedTuple):
+    status: int
+    headers: Any            # CIMultiDictProxy
+    body: bytes
+
+
+@dataclass
+class _CachedResponse:
+    """Validators, raw body and parsed model of the last 200 for one path."""
+    etag: Optional[str]
+    last_modified: Optional[str]
+    body: bytes
+    value: Any
+
+
+def _browser_headers(scheme: str, host: str, port: int) -> dict:
+    """Headers that exactly match the browser UI, for firmware compatibility."""
+    return {
+        "Accept": "application/json, text/plain, */*",
+        "Cache-Control": "no-cache",
+        "Pragma": "no-cache",
+        "Connection": "keep-alive",
+        "X-Requested-With": "XMLHttpRequest",
+        "Referer": f"{scheme}://{host}:{port}/e-mobility/app",
+        "User-Agent": "Mozilla/5.0 (HomeAssistant) AppleWebKit/537.36",
+        "Origin": f"{scheme}://{host}:{port}",
+    }
+
+
+class EMSHomeAsyncHTTP:
+    """HTTP client for the eMS Home web interface with OAuth2 auth.
+
+    Built on a pooled aiohttp session.  An expired token is renewed with
+    the password grant before a request, and a 401 is retried once after
+    logging in again.  Pass the shared Home Assistant session to reuse
+    its keep-alive connection pool; without one a private session is
+    created and closed by close().
+    Request latency, logins and 401 retries are recorded in *metrics*
+    when one is given.  A *limiter* semaphore shared between clients caps
+    their combined in-flight requests (see EMSHomeFleet); time spent
+    waiting for it is not counted as request latency.
+
+    GET endpoints return the previous model object unchanged (same
+    identity) when the device answers 304 to a conditional request or
+    sends a byte-identical body, so callers can skip work with ``is``.
+
+    Logins are single-flight: concurrent callers (e.g. a poll and a charge
+    mode write that both got a 401) share one token request.  After
+    start_token_refresh() the token is renewed in the background well
+    before it expires, and every new token is passed to the callbacks
+    registered with add_token_listener().
+    """
 
     _CLIENT_ID     = "emos"
     _CLIENT_SECRET = "56951025"
@@ -153,60 +229,126 @@ class EMSHomeHTTP:
 
     def __init__(self, host: str, password: str, port: int = 80,
                  use_https: bool = False, verify_ssl: bool = False,
-                 timeout: float = 8.0):
+                 timeout: float = 8.0,
+                 session: Optional[aiohttp.ClientSession] = None,
+                 metrics: Optional[EMSHomeMetrics] = None,
+                 limiter: Optional[asyncio.Semaphore] = None):
         scheme = "https" if use_https or port == 443 else "http"
-        self._base    = f"{scheme}://{host}:{port}"
-        self._host    = host
+        self._base     = f"{scheme}://{host}:{port}"
+        self._host     = host
         self._password = password
-        self._timeout  = timeout
-
-        self._session: Session = requests.Session()
-        self._session.verify = verify_ssl
-        # Exactly match browser headers for compatibility with eMS Home firmware
-        self._session.headers.update({
-            "Accept": "application/json, text/plain, */*",
-            "Cache-Control": "no-cache",
-            "Pragma": "no-cache",
-            "Connection": "keep-alive",
-            "X-Requested-With": "XMLHttpRequest",
-            "Referer": f"{scheme}://{host}:{port}/e-mobility/app",
-            "User-Agent": "Mozilla/5.0 (HomeAssistant) AppleWebKit/537.36",
-            "Origin": f"{scheme}://{host}:{port}",
-        })
+        self._timeout  = aiohttp.ClientTimeout(total=timeout)
+        self._ssl      = None if verify_ssl else False
+
+        self._session: Optional[aiohttp.ClientSession] = session
+        self._owns_session = session is None
+        self._limiter = limiter if limiter is not None else contextlib.nullcontext()
+        # Headers are sent per request so a shared session stays neutral
+        self._headers = _browser_headers(scheme, host, port)
 
         self._access_token: Optional[str] = None
+        self._token_issued_at: float = 0.0
         self._token_expires_at: float = 0.0
+        self._login_task: Optional[asyncio.Future] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        self._token_listeners: list[Callable[[str], None]] = []
+        self.metrics = metrics
+        self._responses: dict[str, _CachedResponse] = {}
+
+    def _get_session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+            self._owns_session = True
+        return self._session
 
     def _is_token_valid(self) -> bool:
         return (self._access_token is not None and
                 time.time() < self._token_expires_at - 60)
 
-    def _apply_auth(self) -> None:
+    async def _apply_auth(self) -> None:
         if not self._is_token_valid():
-            self.login()
+            await self.login()
+
+    async def _send(self, method: str, path: str, retry_401: bool,
+                    headers: Optional[dict] = None,
+                    **kwargs) -> Optional[_Response]:
+        async with self._limiter:
+            return await self._send_now(method, path, retry_401, headers, **kwargs)
+
+    async def _send_now(self, method: str, path: str, retry_401: bool,
+                        headers: Optional[dict], **kwargs) -> Optional[_Response]:
+        start = time.monotonic()
+        ok = False
+        try:
+            async with self._get_session().request(
+                method, f"{self._base}{path}",
+                headers={**self._headers, **headers} if headers else self._headers,
+                timeout=self._timeout, ssl=self._ssl, **kwargs
+            ) as resp:
+                if resp.status == 401 and retry_401:
+                    return None
+                resp.raise_for_status()
+                body = await resp.read()
+                ok = True
+                return _Response(resp.status, resp.headers, body)
+        finally:
+            # Also runs when the caller's timeout cancels the request
+            if self.metrics is not None:
+                self.metrics.record_http(path, time.monotonic() - start, ok)
+
+    async def _request(self, method: str, path: str, **kwargs) -> _Response:
+        """Send an authenticated request and return the response."""
+        await self._apply_auth()
+        token = self._access_token
+        resp = await self._send(method, path, True, **kwargs)
+        if resp is None:
+            if self.metrics is not None:
+                self.metrics.unauthorized_retries += 1
+            # Only log in if nobody replaced the rejected token meanwhile
+            if self._access_token == token:
+                await self.login()
+            resp = await self._send(method, path, False, **kwargs)
+        return resp
 
-    def _request(self, method: str, path: str, **kwargs) -> "requests.Response":
-        self._apply_auth()
-        resp = getattr(self._session, method)(
-            f"{self._base}{path}", timeout=self._timeout, **kwargs
+    async def _get_model(self, path: str, parse: Callable[[dict], _T]) -> _T:
+        """GET *path* and parse it, reusing the last model if unchanged."""
+        cached = self._responses.get(path)
+        headers = {}
+        if cached is not None:
+            if cached.etag:
+                headers["If-None-Match"] = cached.etag
+            if cached.last_modified:
+                headers["If-Modified-Since"] = cached.last_modified
+        resp = await self._request("GET", path, headers=headers)
+        if cached is not None and (resp.status == 304 or resp.body == cached.body):
+            return cached.value
+        value = parse(json.loads(resp.body))
+        self._responses[path] = _CachedResponse(
+            resp.headers.get("ETag"), resp.headers.get("Last-Modified"), resp.body, value
         )
-        if resp.status_code == 401:
-            self.login()
-            resp = getattr(self._session, method)(
-                f"{self._base}{path}", timeout=self._timeout, **kwargs
-            )
-        resp.raise_for_status()
-        return resp
+        return value
+
+    async def _put(self, path: str, **kwargs) -> bytes:
+        return (await self._request("PUT", path, **kwargs)).body
 
-    def _get(self, path: str, **kwargs) -> "requests.Response":
-        return self._request("get", path, **kwargs)
+    async def login(self) -> dict:
+        """Obtain a JWT Bearer token via OAuth2 password grant.
 
-    def _put(self, path: str, **kwargs) -> "requests.Response":
-        return self._request("put", path, **kwargs)
+        Joins the login already in flight, if any.  The shared request is
+        shielded so a caller's timeout does not cancel it for the others.
+        """
+        task = self._login_task
+        if task is None:
+            task = self._login_task = asyncio.ensure_future(self._login())
+            task.add_done_callback(self._login_done)
+        return await asyncio.shield(task)
 
-    def login(self) -> dict:
-        """Obtain a JWT Bearer token via OAuth2 password grant."""
-        url = f"{self._base}{self._TOKEN_PATH}"
+    def _login_done(self, task: asyncio.Future) -> None:
+        self._login_task = None
+        if not task.cancelled():
+            task.exception()  # retrieved: every waiter may have timed out
+
+    async def _login(self) -> dict:
         data = {
             "grant_type":    "password",
             "client_id":     self._CLIENT_ID,
@@ -214,23 +356,111 @@ class EMSHomeHTTP:
             "username":      self._USERNAME,
             "password":      self._password,
         }
-        resp = self._session.post(url, data=data, timeout=self._timeout)
-        resp.raise_for_status()
+        headers = {k: v for k, v in self._headers.items() if k != "Authorization"}
+        async with self._limiter:
+            start = time.monotonic()
+            ok = False
+            try:
+                async with self._get_session().post(
+                    f"{self._base}{self._TOKEN_PATH}", data=data, headers=headers,
+                    timeout=self._timeout, ssl=self._ssl,
+                ) as resp:
+                    resp.raise_for_status()
+                    token_data = await resp.json(content_type=None)
+                    ok = True
+            finally:
+                if self.metrics is not None:
+                    self.metrics.record_http(self._TOKEN_PATH, time.monotonic() - start, ok)
+        if self.metrics is not None:
+            self.metrics.logins += 1
+
+        self._access_token     = token_data["access_token"]
+        expires_in             = int(token_data.get("expires_in", 604800))
+        self._token_issued_at  = time.time()
+        self._token_expires_at = self._token_issued_at + expires_in
+
+        self._headers["Authorization"] = f"Bearer {self._access_token}"
+        for listener in list(self._token_listeners):
+            listener(self._access_token)
+        return token_data
 
-        token_data = resp.json()
-        self._access_token    = token_data["access_token"]
-        expires_in            = int(token_data.get("expires_in", 604800))
-        self._token_expires_at = time.time() + expires_in
+    def token_data(self) -> dict:
+        """The current token in a form restore_token() accepts."""
+        return {
+            "base_url": self._base,
+            "access_token": self._access_token,
+            "issued_at": self._token_issued_at,
+            "expires_at": self._token_expires_at,
+        }
 
-        self._session.headers.update(
-            {"Authorization": f"Bearer {self._access_token}"}
-        )
-        return token_data
+    def restore_token(self, data: Optional[dict]) -> bool:
+        """Adopt a token saved from token_data() instead of logging in.
+
+        Only checked locally (same device URL, not close to expiry); if the
+        device has revoked it, the first request gets a 401 and logs in.
+        """
+        try:
+            token = data["access_token"]
+            issued_at = float(data["issued_at"])
+            expires_at = float(data["expires_at"])
+        except (TypeError, KeyError, ValueError):
+            return False
+        if (
+            not token
+            or data.get("base_url") != self._base
+            or time.time() > expires_at - TOKEN_MIN_REMAINING
+        ):
+            return False
+        self._access_token     = token
+        self._token_issued_at  = issued_at
+        self._token_expires_at = expires_at
+        self._headers["Authorization"] = f"Bearer {token}"
+        return True
+
+    def add_token_listener(self, listener: Callable[[str], None]) -> Callable[[], None]:
+        """Call *listener* with every new token; returns an unsubscribe callable."""
+        self._token_listeners.append(listener)
+        return lambda: self._token_listeners.remove(listener)
+
+    def start_token_refresh(self) -> None:
+        """Renew the token in the background before it expires."""
+        if self._refresh_task is None:
+            self._refresh_task = asyncio.create_task(
+                self._refresh_loop(), name=f"ems_home_token_{self._host}"
+            )
+
+    async def _refresh_loop(self) -> None:
+        while True:
+            lifetime = self._token_expires_at - self._token_issued_at
+            refresh_at = self._token_issued_at + max(
+                lifetime * TOKEN_REFRESH_FRACTION, TOKEN_MIN_REFRESH_DELAY
+            )
+            await asyncio.sleep(max(refresh_at - time.time(), 0))
+            try:
+                await self.login()
+                _LOGGER.debug("Access token renewed for %s", self._host)
+            except Exception as exc:
+                _LOGGER.warning("Token renewal for %s failed: %s", self._host, exc)
+                await asyncio.sleep(TOKEN_RETRY_DELAY)
 
     def logout(self) -> None:
         self._access_token     = None
         self._token_expires_at = 0.0
-        self._session.headers.pop("Authorization", None)
+        self._headers.pop("Authorization", None)
+        self._responses.clear()
+
+    async def close(self) -> None:
+        """Stop background logins, drop the token and close an own session."""
+        tasks = [t for t in (self._refresh_task, self._login_task) if t is not None]
+        self._refresh_task = None
+        for task in tasks:
+            task.cancel()
+        # Let them unwind before the session they use is closed
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self.logout()
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
 
     @property
     def token(self) -> Optional[str]:
@@ -240,33 +470,31 @@ class EMSHomeHTTP:
     # API endpoints
     # ------------------------------------------------------------------
 
-    def get_device_status(self) -> DeviceStatus:
-        raw = self._get("/api/device-settings/devicestatus").json()
-        return DeviceStatus.from_dict(raw)
+    async def get_device_status(self) -> DeviceStatus:
+        return await self._get_model(PATH_DEVICE_STATUS, DeviceStatus.from_dict)
 
-    def get_emobility_state(self) -> EMobilityState:
-        raw = self._get("/api/e-mobility/state").json()
-        return EMobilityState.from_dict(raw)
+    async def get_emobility_state(self) -> EMobilityState:
+        return await self._get_model(PATH_EMOBILITY_STATE, EMobilityState.from_dict)
 
-    def get_charge_mode(self) -> ChargeModeConfig:
-        raw = self._get("/api/e-mobility/config/chargemode").json()
-        return ChargeModeConfig.from_dict(raw)
+    async def get_charge_mode(self) -> ChargeModeConfig:
+        return await self._get_model(PATH_CHARGE_MODE, ChargeModeConfig.from_dict)
 
-    def set_charge_mode(self, mode: str,
-                        min_charging_power_quota: Optional[int] = None,
-                        min_pv_power_quota: int = 0) -> ChargeModeConfig:
+    async def set_charge_mode(self, mode: str,
+                              min_charging_power_quota: Optional[int] = None,
+                              min_pv_power_quota: int = 0,
+                              read_back: bool = True) -> Optional[ChargeModeConfig]:
+        """PUT the charge mode; with *read_back* GET and return the result."""
         payload = {
             "mode": mode,
             "mincharginpowerquota": min_charging_power_quota,
             "minpvpowerquota": min_pv_power_quota,
         }
-        self._put("/api/e-mobility/config/chargemode", json=payload)
-        return self.get_charge_mode()
+        await self._put(PATH_CHARGE_MODE, json=payload)
+        return await self.get_charge_mode() if read_back else None
 
-    def __enter__(self):
-        self.login()
+    async def __aenter__(self):
+        await self.login()
         return self
 
-    def __exit__(self, *_):
-        self.logout()
-
+    async def __aexit__(self, *_):
+        await self.close()
@@ -0,0 +1,89 @@
+"""
+eMS Home – energy integration from real-time smart meter power.
+
+Integrates the per-frame power values over the device timestamps
+(SmartMeterReading.timestamp) with the trapezoidal rule.  Intervals that
+are too long (stream outage, restart) or not moving forward are skipped
+rather than extrapolated, and negative power never decreases a total.
+"""
+from __future__ import annotations
+
+from typing import NamedTuple, Optional
+
+from .smart_meter_ws import SmartMeterReading
+
+# Longest interval between two frames that is still integrated (seconds)
+MAX_GAP = 30.0
+
+# Accumulator name -> SmartMeterReading power field (W)
+ENERGY_CHANNELS: dict[str, str] = {
+    "import": "power_total",
+    "export": "power_export",
+    "l1":     "power_l1",
+    "l2":     "power_l2",
+    "l3":     "power_l3",
+}
+
+_WS_PER_KWH = 3_600_000.0
+
+
+class EnergyTotals(NamedTuple):
+    """Integrated energy in kWh."""
+    import_kwh: float
+    export_kwh: float
+    l1_kwh: float
+    l2_kwh: float
+    l3_kwh: float
+
+
+class EnergyIntegrator:
+    """Accumulates kWh per channel from successive smart meter readings."""
+
+    def __init__(self, max_gap: float = MAX_GAP) -> None:
+        self._max_gap = max_gap
+        self._kwh: dict[str, float] = dict.fromkeys(ENERGY_CHANNELS, 0.0)
+        self._last_ts: Optional[float] = None
+        self._last_power: dict[str, float] = dict.fromkeys(ENERGY_CHANNELS, 0.0)
+        # Intervals longer than max_gap or far out of order since start-up;
+        # reported in diagnostics, not persisted
+        self.skipped_gaps = 0
+
+    def add(self, reading: SmartMeterReading) -> None:
+        ts = reading.timestamp
+        if not ts:
+            return
+        last_ts = self._last_ts
+        kwh, last_power = self._kwh, self._last_power
+        if last_ts is not None:
+            dt = ts - last_ts
+            if dt <= 0 and dt > -self._max_gap:
+                return  # duplicate or reordered frame: keep the older reference
+            if 0 < dt <= self._max_gap:
+                for name, field in ENERGY_CHANNELS.items():
+                    p0 = last_power[name]
+                    p1 = getattr(reading, field)
+                    # Trapezoid with negative samples clamped to zero
+                    avg = (max(p0, 0.0) + max(p1, 0.0)) / 2
+                    kwh[name] += avg * dt / _WS_PER_KWH
+            else:
+                self.skipped_gaps += 1
+        self._last_ts = ts
+        for name, field in ENERGY_CHANNELS.items():
+            last_power[name] = getattr(reading, field)
+
+    def totals(self) -> EnergyTotals:
+        k = self._kwh
+        return EnergyTotals(k["import"], k["export"], k["l1"], k["l2"], k["l3"])
+
+    def as_dict(self) -> dict:
+        """Serialisable state for the per-entry Store."""
+        return {"kwh": dict(self._kwh)}
+
+    def restore(self, data: Optional[dict]) -> None:
+        """Load totals saved by as_dict(); integration resumes on the next frame."""
+        if not data:
+            return
+        for name, value in (data.get("kwh") or {}).items():
+            if name in self._kwh:
+                self._kwh[name] = max(float(value), 0.0)
+        self._last_ts = None
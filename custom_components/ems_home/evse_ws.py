@@ -1,34 +1,79 @@
 """
-eMS Home – EVSE (Wallbox) WebSocket client.
+eMS Home – EVSE (Wallbox) stream decoder.
 
-Connects to ws://<host>/api/data-transfer/ws/protobuf/gdr/local/values/+/evse
-and decodes the binary protobuf frames into an EVSEReading dataclass.
+Frames from ws://<host>/api/data-transfer/ws/protobuf/gdr/local/values/+/evse
+(see ws_stream.WSStreamManager) are decoded into an EVSEReading dataclass.
+Numeric channel data (field 4) uses the same OBIS channel ids and data
+point layout as the smart meter stream, measured at the wallbox.
 """
 from __future__ import annotations
 
-import asyncio
 import logging
 from dataclasses import dataclass
-from typing import Callable, Optional
+from typing import Optional
 
 from .smart_meter_ws import (
-    _ws_open,
-    _ws_recv_frame,
-    _ws_close,
-    _send_ws_text,
-    _decode_fields,
+    CH_CURRENT_L1,
+    CH_CURRENT_L2,
+    CH_CURRENT_L3,
+    CH_ENERGY_TOTAL,
+    CH_POWER_L1,
+    CH_POWER_L2,
+    CH_POWER_L3,
+    CH_POWER_TOTAL,
+    ChannelSpec,
+    _decode_datapoint,
+    _decode_timestamp,
+    _find_field,
+    _iter_fields,
 )
+from .ws_stream import WS_BASE_PATH
 
 _LOGGER = logging.getLogger(__name__)
 
-WS_EVSE_PATH = "/api/data-transfer/ws/protobuf/gdr/local/values/+/evse"
+WS_EVSE_PATH = WS_BASE_PATH + "+/evse"
 
 
 # ---------------------------------------------------------------------------
 # Data class
 # ---------------------------------------------------------------------------
 
-@dataclass
+EVSE_STATUS_TEXT: dict[int, str] = {
+    0: "unknown",
+    1: "available",
+    2: "occupied",
+    3: "preparing",
+    4: "charging",
+    5: "finishing",
+    6: "reserved",
+    7: "unavailable",
+    8: "faulted",
+    9: "suspended_ev",
+    10: "suspended_evse",
+}
+
+# Statuses during which a session is running or about to change state
+EVSE_ACTIVE_STATUSES: frozenset[int] = frozenset({3, 4, 5, 9, 10})
+
+# Field 4 channel id -> (EVSEReading field, raw scale divisor)
+EVSE_CHANNELS: dict[int, ChannelSpec] = {
+    CH_POWER_TOTAL:  ChannelSpec("power_total",  1000),
+    CH_POWER_L1:     ChannelSpec("power_l1",     1000),
+    CH_POWER_L2:     ChannelSpec("power_l2",     1000),
+    CH_POWER_L3:     ChannelSpec("power_l3",     1000),
+    CH_CURRENT_L1:   ChannelSpec("current_l1",   1000),
+    CH_CURRENT_L2:   ChannelSpec("current_l2",   1000),
+    CH_CURRENT_L3:   ChannelSpec("current_l3",   1000),
+    CH_ENERGY_TOTAL: ChannelSpec("energy_total", 1000),
+}
+
+# Channels that set EVSEReading.has_power
+EVSE_POWER_CHANNELS: frozenset[int] = frozenset(
+    {CH_POWER_TOTAL, CH_POWER_L1, CH_POWER_L2, CH_POWER_L3}
+)
+
+
+@dataclass(slots=True)
 class EVSEReading:
     """Decoded EVSE snapshot from one WebSocket frame."""
     uuid: str = ""
@@ -41,7 +86,19 @@ class EVSEReading:
     session_duration: int = 0       # seconds
     session_energy: float = 0.0     # Wh
     energy_total: float = 0.0       # Wh
-    timestamp: float = 0.0
+    # Channel data (field 4): has_measurements is set when any channel was
+    # decoded, has_power only when a power channel was
+    power_total: float = 0.0        # W
+    power_l1: float = 0.0           # W
+    power_l2: float = 0.0           # W
+    power_l3: float = 0.0           # W
+    current_l1: float = 0.0         # A
+    current_l2: float = 0.0         # A
+    current_l3: float = 0.0         # A
+    has_measurements: bool = False
+    has_power: bool = False
+    timestamp: float = 0.0          # device time (epoch seconds)
+    received_at: float = 0.0        # time.monotonic() when delivered
 
     @property
     def hw_imax_amps(self) -> float:
@@ -66,20 +123,8 @@ class EVSEReading:
     @property
     def status_text(self) -> str:
         """Human-readable EVSE status."""
-        status_map = {
-            0: "unknown",
-            1: "available",
-            2: "occupied",
-            3: "preparing",
-            4: "charging",
-            5: "finishing",
-            6: "reserved",
-            7: "unavailable",
-            8: "faulted",
-            9: "suspended_ev",
-            10: "suspended_evse",
-        }
-        return status_map.get(self.evse_status, f"status_{self.evse_status}")
+        text = EVSE_STATUS_TEXT.get(self.evse_status)
+        return text if text is not None else f"status_{self.evse_status}"
 
 
 # ---------------------------------------------------------------------------
@@ -89,42 +134,51 @@ class EVSEReading:
 def decode_evse_frame(raw: bytes) -> Optional[EVSEReading]:
     """Decode an EVSE protobuf frame."""
     try:
-        outer = _decode_fields(raw)
         # field 1 = outer wrapper
-        wrapper_bytes = next((v for fn, wt, v in outer if fn == 1 and wt == 2), None)
-        if wrapper_bytes is None:
+        wrapper = _find_field(raw, 1, 2)
+        if wrapper is None:
             return None
 
-        wrapper = _decode_fields(wrapper_bytes)
         # field 1 = UUID, field 2 = inner payload
         uuid = ""
-        inner_bytes = None
-        for fn, wt, v in wrapper:
-            if fn == 1 and wt == 2:
+        inner = None
+        for fn, wt, v in _iter_fields(wrapper):
+            if wt != 2:
+                continue
+            if fn == 1:
                 try:
-                    uuid = v.decode("utf-8")
+                    uuid = str(v, "utf-8")
                 except Exception:
                     pass
-            elif fn == 2 and wt == 2:
-                inner_bytes = v
+            elif fn == 2:
+                inner = v
 
-        if inner_bytes is None:
+        if inner is None:
             return None
 
         reading = EVSEReading(uuid=uuid)
-        inner = _decode_fields(inner_bytes)
+        channels = EVSE_CHANNELS
 
-        for fn, wt, v in inner:
+        for fn, wt, v in _iter_fields(inner):
+            if wt != 2:
+                continue
             # field 3 = timestamp
-            if fn == 3 and wt == 2:
-                tsf = _decode_fields(v)
-                sec = next((val for f, _, val in tsf if f == 1), 0)
-                ns = next((val for f, _, val in tsf if f == 2), 0)
-                reading.timestamp = sec + ns / 1e9
+            if fn == 3:
+                reading.timestamp = _decode_timestamp(v)
+
+            # field 4 = channel data (numeric measurements)
+            elif fn == 4:
+                ch_id, raw_v = _decode_datapoint(v)
+                if ch_id is not None and raw_v is not None:
+                    spec = channels.get(ch_id)
+                    if spec is not None:
+                        setattr(reading, spec.field, raw_v / spec.divisor)
+                        reading.has_measurements = True
+                        if ch_id in EVSE_POWER_CHANNELS:
+                            reading.has_power = True
 
-            # field 4 = channel data (numeric measurements) – reserved for future use
             # field 5 = named key-value pairs
-            elif fn == 5 and wt == 2:
+            elif fn == 5:
                 _apply_evse_property(reading, v)
 
         return reading
@@ -133,123 +187,60 @@ def decode_evse_frame(raw: bytes) -> Optional[EVSEReading]:
         return None
 
 
+def _first_varint(data) -> int:
+    for f, wt, val in _iter_fields(data):
+        if f == 1 and wt == 0:
+            return val
+    return 0
+
 
+def _first_string(data) -> Optional[str]:
+    s = _find_field(data, 2, 2)
+    return str(s, "utf-8", errors="replace") if s else None
 
-def _apply_evse_property(reading: EVSEReading, prop_bytes: bytes) -> None:
+
+def _apply_evse_property(reading: EVSEReading, prop) -> None:
     """Parse a named property (field 5) and apply it to the reading."""
     try:
-        fields = _decode_fields(prop_bytes)
-        name_bytes = next((v for fn, wt, v in fields if fn == 1 and wt == 2), None)
-        value_bytes = next((v for fn, wt, v in fields if fn == 2 and wt == 2), None)
+        name_bytes = value_bytes = None
+        for fn, wt, v in _iter_fields(prop):
+            if wt != 2:
+                continue
+            if fn == 1 and name_bytes is None:
+                name_bytes = v
+            elif fn == 2 and value_bytes is None:
+                value_bytes = v
+            if name_bytes is not None and value_bytes is not None:
+                break
 
         if name_bytes is None:
             return
 
-        name = name_bytes.decode("utf-8")
+        name = str(name_bytes, "utf-8")
 
         if value_bytes is None or len(value_bytes) == 0:
             return
 
         # Decode the value sub-message
-        value_fields = _decode_fields(value_bytes)
-
         if name == "evse_session_duration":
-            reading.session_duration = next(
-                (val for f, _, val in value_fields if f == 1), 0
-            )
+            reading.session_duration = _first_varint(value_bytes)
         elif name == "evse_status":
-            reading.evse_status = next(
-                (val for f, _, val in value_fields if f == 1), 0
-            )
+            reading.evse_status = _first_varint(value_bytes)
         elif name == "evse_status_code":
-            s = next((v for f, wt, v in value_fields if f == 2 and wt == 2), None)
+            s = _first_string(value_bytes)
             if s:
-                reading.evse_status_code = s.decode("utf-8", errors="replace")
+                reading.evse_status_code = s
         elif name == "evse_error_code":
-            s = next((v for f, wt, v in value_fields if f == 2 and wt == 2), None)
+            s = _first_string(value_bytes)
             if s:
-                reading.evse_error_code = s.decode("utf-8", errors="replace")
+                reading.evse_error_code = s
         elif name == "evse_serial":
-            s = next((v for f, wt, v in value_fields if f == 2 and wt == 2), None)
+            s = _first_string(value_bytes)
             if s:
-                reading.evse_serial = s.decode("utf-8", errors="replace").strip()
+                reading.evse_serial = s.strip()
         elif name == "evse_hw_imax":
-            reading.evse_hw_imax = next(
-                (val for f, _, val in value_fields if f == 1), 0
-            )
+            reading.evse_hw_imax = _first_varint(value_bytes)
         elif name == "ev_imax_default":
-            reading.ev_imax_default = next(
-                (val for f, _, val in value_fields if f == 1), 0
-            )
+            reading.ev_imax_default = _first_varint(value_bytes)
     except Exception as exc:
         _LOGGER.debug("Failed to parse EVSE property: %s", exc)
-
-
-# ---------------------------------------------------------------------------
-# Async WebSocket client
-# ---------------------------------------------------------------------------
-
-class EVSEWebSocket:
-    """Persistent WebSocket connection for EVSE data with auto-reconnect."""
-
-    def __init__(
-        self,
-        host: str,
-        token: str,
-        on_reading: Callable[[EVSEReading], None],
-        port: int = 80,
-    ) -> None:
-        self._host = host
-        self._port = port
-        self._token = token
-        self._callback = on_reading
-        self._task: Optional[asyncio.Task] = None
-        self._running = False
-
-    def update_token(self, token: str) -> None:
-        self._token = token
-
-    async def start(self) -> None:
-        self._running = True
-        self._task = asyncio.create_task(self._run_loop())
-
-    async def stop(self) -> None:
-        self._running = False
-        if self._task:
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                pass
-
-    async def _run_loop(self) -> None:
-        delay = 1.0
-        while self._running:
-            try:
-                await self._connect_and_listen()
-                delay = 1.0
-            except asyncio.CancelledError:
-                break
-            except Exception as exc:
-                _LOGGER.warning(
-                    "EVSE WebSocket error (%s), reconnecting in %.0fs", exc, delay
-                )
-                await asyncio.sleep(delay)
-                delay = min(delay * 2, 60.0)
-
-    async def _connect_and_listen(self) -> None:
-        reader, writer = await _ws_open(
-            self._host, self._port, WS_EVSE_PATH, self._token
-        )
-        _LOGGER.info("EVSE WebSocket connected")
-        _send_ws_text(writer, f"Bearer {self._token}")
-        await writer.drain()
-        try:
-            while self._running:
-                payload = await _ws_recv_frame(reader)
-                reading = decode_evse_frame(payload)
-                if reading is not None:
-                    self._callback(reading)
-        finally:
-            await _ws_close(writer)
-
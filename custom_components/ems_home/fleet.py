@@ -0,0 +1,121 @@
+"""
+eMS Home – resources shared by all hubs of one Home Assistant instance.
+
+Every config entry joins the EMSHomeFleet and builds its HTTP client and
+WebSocket stream manager through it, so all hubs use one aiohttp
+connection pool and the process-wide TLS context of ws_stream.  In-flight
+HTTP requests and WebSocket handshakes are capped across the fleet, and
+each hub is given a poll phase so hubs set up together do not all poll
+in the same tick.  No Home Assistant imports; tools/load_test.py drives
+it against simulated hubs.
+"""
+from __future__ import annotations
+
+import asyncio
+from typing import TYPE_CHECKING, Optional
+
+import aiohttp
+
+from .ems_home_api import EMSHomeAsyncHTTP
+from .ws_stream import WSStreamManager
+
+if TYPE_CHECKING:
+    from .capture import CaptureWriter
+    from .metrics import EMSHomeMetrics
+
+# Fleet-wide caps.  The device answers in tens of milliseconds, so 16
+# requests in flight keep dozens of hubs polling on time; TLS handshakes
+# are CPU-heavy on both ends and are spread out further.
+MAX_CONCURRENT_REQUESTS = 16
+MAX_CONCURRENT_HANDSHAKES = 4
+
+# Fractional part of the golden ratio: phases k * step (mod 1) stay evenly
+# spread however many hubs have joined
+_PHASE_STEP = 0.6180339887498949
+
+
+def phased_interval(interval: float, phase: float) -> float:
+    """Gap after a hub's first poll, moving it to its phase in the poll cycle.
+
+    A hub polls once as soon as it is set up, then waits one interval plus
+    its phase offset; every later gap is the plain interval.
+    """
+    return interval * (1.0 + phase)
+
+
+class EMSHomeFleet:
+    """Connection pool, concurrency caps and poll phases shared by all hubs.
+
+    Pass the Home Assistant client session to reuse its pool; without one
+    a private session is created on first use and closed by close().
+    """
+
+    def __init__(
+        self,
+        session: Optional[aiohttp.ClientSession] = None,
+        max_requests: int = MAX_CONCURRENT_REQUESTS,
+        max_handshakes: int = MAX_CONCURRENT_HANDSHAKES,
+    ) -> None:
+        self._session = session
+        self._owns_session = session is None
+        self.request_limit = asyncio.Semaphore(max_requests)
+        self.handshake_limit = asyncio.Semaphore(max_handshakes)
+        self._phases: dict[str, float] = {}
+        self._joined = 0
+
+    @property
+    def session(self) -> aiohttp.ClientSession:
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession()
+            self._owns_session = True
+        return self._session
+
+    def join(self, hub_id: str) -> float:
+        """Register a hub and return its poll phase as a fraction (0–1) of the interval."""
+        phase = self._phases.get(hub_id)
+        if phase is None:
+            phase = self._phases[hub_id] = (self._joined * _PHASE_STEP) % 1.0
+            self._joined += 1
+        return phase
+
+    def leave(self, hub_id: str) -> bool:
+        """Unregister a hub; returns True when no hub is left."""
+        self._phases.pop(hub_id, None)
+        return not self._phases
+
+    def create_client(
+        self,
+        host: str,
+        password: str,
+        port: int = 80,
+        metrics: Optional[EMSHomeMetrics] = None,
+    ) -> EMSHomeAsyncHTTP:
+        """HTTP client on the shared pool, counted against the request cap."""
+        return EMSHomeAsyncHTTP(
+            host, password, port=port,
+            use_https=(port == 443),
+            verify_ssl=False,
+            session=self.session,
+            metrics=metrics,
+            limiter=self.request_limit,
+        )
+
+    def create_streams(
+        self,
+        host: str,
+        port: int,
+        token: str,
+        recorder: Optional[CaptureWriter] = None,
+        metrics: Optional[EMSHomeMetrics] = None,
+    ) -> WSStreamManager:
+        """WebSocket stream manager counted against the handshake cap."""
+        return WSStreamManager(
+            host, port, token, recorder=recorder, metrics=metrics,
+            handshake_limit=self.handshake_limit,
+        )
+
+    async def close(self) -> None:
+        """Close the session if the fleet created it."""
+        if self._owns_session and self._session is not None:
+            await self._session.close()
+        self._session = None
@@ -0,0 +1,136 @@
+"""
+eMS Home – rolling in-memory history of smart meter readings.
+
+A fixed-capacity ring buffer with one preallocated array('d') column per
+smart meter channel plus a timestamp column.  Appending a frame writes
+floats into existing slots (no per-frame objects), and windowed
+min/max/mean queries scan backwards from the newest sample.
+"""
+from __future__ import annotations
+
+import time
+from array import array
+from typing import Any, NamedTuple, Optional
+
+from .smart_meter_ws import SMART_METER_CHANNELS, SmartMeterReading
+
+DEFAULT_HISTORY_CAPACITY = 1200     # frames; ~20 min at one frame per second
+DIAGNOSTIC_WINDOWS = (60.0, 600.0)  # seconds summarised by as_dict()
+
+HISTORY_FIELDS: tuple[str, ...] = tuple(
+    spec.field for spec in SMART_METER_CHANNELS.values()
+)
+
+
+class WindowStats(NamedTuple):
+    """Aggregate of one field over a time window."""
+    count: int
+    minimum: float
+    maximum: float
+    mean: float
+
+
+class SmartMeterHistory:
+    """Ring buffer holding the most recent *capacity* smart meter frames."""
+
+    def __init__(self, capacity: int = DEFAULT_HISTORY_CAPACITY) -> None:
+        if capacity <= 0:
+            raise ValueError("capacity must be positive")
+        self._capacity = capacity
+        self._head = 0          # next slot to write
+        self._size = 0
+        self._timestamps = array("d", bytes(8 * capacity))
+        self._columns: dict[str, array] = {
+            field: array("d", bytes(8 * capacity)) for field in HISTORY_FIELDS
+        }
+        # (field, column) pairs so append() avoids a dict lookup per field
+        self._pairs = tuple(self._columns.items())
+
+    def __len__(self) -> int:
+        return self._size
+
+    @property
+    def capacity(self) -> int:
+        return self._capacity
+
+    def append(self, reading: SmartMeterReading) -> None:
+        """Store *reading*, overwriting the oldest frame when full. O(1)."""
+        i = self._head
+        self._timestamps[i] = reading.timestamp or time.time()
+        for field, column in self._pairs:
+            column[i] = getattr(reading, field)
+        self._head = (i + 1) % self._capacity
+        if self._size < self._capacity:
+            self._size += 1
+
+    def latest_timestamp(self) -> Optional[float]:
+        if not self._size:
+            return None
+        return self._timestamps[self._head - 1]
+
+    def window(
+        self, field: str, seconds: float, end: Optional[float] = None
+    ) -> Optional[WindowStats]:
+        """Min/max/mean of *field* over the last *seconds* up to *end*.
+
+        *end* defaults to the newest sample's timestamp.  Returns None when
+        the window holds no samples.
+        """
+        column = self._columns[field]
+        if not self._size:
+            return None
+        ts = self._timestamps
+        if end is None:
+            end = ts[self._head - 1]
+        start = end - seconds
+        cap = self._capacity
+        i = self._head
+        count = 0
+        total = 0.0
+        lo = hi = None
+        for _ in range(self._size):
+            i = (i - 1) % cap
+            t = ts[i]
+            if t > end:
+                continue
+            if t < start:
+                break
+            v = column[i]
+            total += v
+            count += 1
+            if lo is None or v < lo:
+                lo = v
+            if hi is None or v > hi:
+                hi = v
+        if not count:
+            return None
+        return WindowStats(count, lo, hi, total / count)
+
+    def as_dict(self, windows: tuple[float, ...] = DIAGNOSTIC_WINDOWS) -> dict[str, Any]:
+        """Size, covered span and per-field window stats, for diagnostics."""
+        span = None
+        if self._size:
+            oldest = self._timestamps[(self._head - self._size) % self._capacity]
+            span = round(self._timestamps[self._head - 1] - oldest, 1)
+        return {
+            "samples": self._size,
+            "capacity": self._capacity,
+            "span_s": span,
+            "windows": {
+                f"{seconds:g}s": {
+                    field: None if stats is None else {
+                        "count": stats.count,
+                        "min": round(stats.minimum, 3),
+                        "max": round(stats.maximum, 3),
+                        "mean": round(stats.mean, 3),
+                    }
+                    for field in HISTORY_FIELDS
+                    for stats in (self.window(field, seconds),)
+                }
+                for seconds in windows
+            },
+        }
+
+    def clear(self) -> None:
+        self._head = 0
+        self._size = 0
@@ -0,0 +1,161 @@
+"""
+eMS Home – runtime performance metrics.
+
+Collected by the HTTP client, the WebSocket stream manager and the
+coordinator so a slow unit can be attributed to the network/device
+(HTTP latency, reconnects) or to this process (decode time, frame to
+state latency).  Latencies keep the most recent samples in a fixed
+array('d') ring and report percentiles on demand; recording is O(1).
+"""
+from __future__ import annotations
+
+import time
+from array import array
+from collections import deque
+from typing import Any, Optional
+
+DEFAULT_WINDOW = 256            # latency samples kept per metric
+FRAME_RATE_WINDOW = 64          # arrival times kept per stream
+FRAME_RATE_MAX_AGE = 10.0       # seconds without frames before the rate reads 0
+
+
+class LatencyWindow:
+    """Most recent *capacity* durations (seconds) with percentile queries."""
+
+    __slots__ = ("_samples", "_capacity", "_head", "_size", "_sorted", "count", "total")
+
+    def __init__(self, capacity: int = DEFAULT_WINDOW) -> None:
+        self._samples = array("d", bytes(8 * capacity))
+        self._capacity = capacity
+        self._head = 0
+        self._size = 0
+        self._sorted: Optional[list[float]] = None
+        self.count = 0          # samples ever recorded
+        self.total = 0.0        # seconds ever recorded
+
+    def add(self, seconds: float) -> None:
+        self._samples[self._head] = seconds
+        self._head = (self._head + 1) % self._capacity
+        if self._size < self._capacity:
+            self._size += 1
+        self._sorted = None
+        self.count += 1
+        self.total += seconds
+
+    def percentile(self, q: float) -> Optional[float]:
+        """Nearest-rank percentile (0–100) of the window, None when empty."""
+        if not self._size:
+            return None
+        if self._sorted is None:
+            self._sorted = sorted(self._samples[: self._size])
+        rank = min(int(q / 100 * self._size), self._size - 1)
+        return self._sorted[rank]
+
+    def as_dict(self, scale: float = 1000.0, digits: int = 2) -> dict[str, Any]:
+        """Summary in milliseconds (scale=1000) or any other unit."""
+        def _fmt(v: Optional[float]) -> Optional[float]:
+            return None if v is None else round(v * scale, digits)
+        return {
+            "count": self.count,
+            "p50": _fmt(self.percentile(50)),
+            "p95": _fmt(self.percentile(95)),
+            "p99": _fmt(self.percentile(99)),
+            "max": _fmt(self.percentile(100)),
+        }
+
+
+class FrameRate:
+    """Frames per second over the last FRAME_RATE_WINDOW arrivals."""
+
+    __slots__ = ("_times",)
+
+    def __init__(self) -> None:
+        self._times: deque[float] = deque(maxlen=FRAME_RATE_WINDOW)
+
+    def add(self, now: float) -> None:
+        self._times.append(now)
+
+    def rate(self, now: Optional[float] = None) -> float:
+        times = self._times
+        if len(times) < 2:
+            return 0.0
+        if now is None:
+            now = time.monotonic()
+        if now - times[-1] > FRAME_RATE_MAX_AGE:
+            return 0.0
+        span = times[-1] - times[0]
+        return (len(times) - 1) / span if span > 0 else 0.0
+
+
+class StreamMetrics:
+    """Decode time, arrival rate and frame-to-state latency of one stream."""
+
+    __slots__ = ("decode", "frame_to_state", "frame_rate", "_published")
+
+    def __init__(self) -> None:
+        self.decode = LatencyWindow()
+        self.frame_to_state = LatencyWindow()
+        self.frame_rate = FrameRate()
+        self._published = 0.0   # received_at of the last reading published
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "frame_rate": round(self.frame_rate.rate(), 2),
+            "decode_us": self.decode.as_dict(scale=1e6, digits=1),
+            "frame_to_state_ms": self.frame_to_state.as_dict(),
+        }
+
+
+class EMSHomeMetrics:
+    """All metrics of one hub."""
+
+    def __init__(self) -> None:
+        self.http: dict[str, LatencyWindow] = {}
+        self.http_errors: dict[str, int] = {}
+        self.logins = 0
+        self.unauthorized_retries = 0
+        self.poll = LatencyWindow()
+        self.streams: dict[str, StreamMetrics] = {}
+
+    # -- HTTP ------------------------------------------------------------
+
+    def record_http(self, path: str, seconds: float, ok: bool = True) -> None:
+        window = self.http.get(path)
+        if window is None:
+            window = self.http[path] = LatencyWindow()
+        window.add(seconds)
+        if not ok:
+            self.http_errors[path] = self.http_errors.get(path, 0) + 1
+
+    def http_percentile(self, path: str, q: float) -> Optional[float]:
+        window = self.http.get(path)
+        return window.percentile(q) if window else None
+
+    # -- WebSocket -------------------------------------------------------
+
+    def stream(self, name: str) -> StreamMetrics:
+        metrics = self.streams.get(name)
+        if metrics is None:
+            metrics = self.streams[name] = StreamMetrics()
+        return metrics
+
+    def record_published(self, name: str, received_at: float, now: float) -> None:
+        """Record frame-to-state latency once per reading that reached entities."""
+        metrics = self.stream(name)
+        if received_at > metrics._published:
+            metrics._published = received_at
+            metrics.frame_to_state.add(now - received_at)
+
+    # -- export ----------------------------------------------------------
+
+    def as_dict(self) -> dict[str, Any]:
+        return {
+            "http": {
+                path: {**window.as_dict(), "errors": self.http_errors.get(path, 0)}
+                for path, window in self.http.items()
+            },
+            "logins": self.logins,
+            "unauthorized_retries": self.unauthorized_retries,
+            "poll_ms": self.poll.as_dict(),
+            "streams": {name: m.as_dict() for name, m in self.streams.items()},
+        }
@@ -83,11 +83,10 @@ class EMSPVQuotaNumber(CoordinatorEntity[EMSHomeCoordinator], NumberEntity):
         self._last_known_quota = int(value)
         data = self.coordinator.data
         current_mode = data.charge_mode.mode if data else ChargeMode.HYBRID
-        await self.hass.async_add_executor_job(self._set_quota, current_mode, int(value))
-        await self.coordinator.async_request_refresh()
+        await self._set_quota(current_mode, int(value))
 
-    def _set_quota(self, mode: str, quota: int) -> None:
-        self.coordinator.client.set_charge_mode(
+    async def _set_quota(self, mode: str, quota: int) -> None:
+        await self.coordinator.async_set_charge_mode(
             mode,
             min_pv_power_quota=quota,
             min_charging_power_quota=(0 if mode == ChargeMode.HYBRID else None),
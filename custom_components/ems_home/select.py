@@ -84,12 +84,11 @@ class EMSChargeModeSelect(CoordinatorEntity[EMSHomeCoordinator], SelectEntity):
             if quota:
                 pv_quota = quota
 
-        await self.hass.async_add_executor_job(self._set_mode, option, pv_quota)
-        await self.coordinator.async_request_refresh()
+        await self._set_mode(option, pv_quota)
 
-    def _set_mode(self, mode: str, pv_quota: int) -> None:
-        client = self.coordinator.client
+    async def _set_mode(self, mode: str, pv_quota: int) -> None:
+        coordinator = self.coordinator
         if mode in (ChargeMode.PV, ChargeMode.HYBRID):
-            client.set_charge_mode(mode, min_pv_power_quota=pv_quota)
+            await coordinator.async_set_charge_mode(mode, min_pv_power_quota=pv_quota)
         else:
-            client.set_charge_mode(mode)
+            await coordinator.async_set_charge_mode(mode)
@@ -1,8 +1,10 @@
 """Sensor platform for eMS Home."""
 from __future__ import annotations
 
+import time
 from dataclasses import dataclass
-from typing import Callable
+from datetime import datetime, timedelta
+from typing import Any, Callable
 
 from homeassistant.components.sensor import (
     SensorDeviceClass,
@@ -13,22 +15,98 @@ from homeassistant.components.sensor import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     PERCENTAGE,
+    EntityCategory,
     UnitOfPower,
     UnitOfTemperature,
+    UnitOfTime,
 )
-from homeassistant.core import HomeAssistant
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity import DeviceInfo
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
+from homeassistant.helpers.event import async_track_time_interval
 from homeassistant.helpers.update_coordinator import CoordinatorEntity
 
 from .const import DATA_COORDINATOR, DOMAIN
 from .coordinator import EMSHomeCoordinator, EMSHomeData
+from .ems_home_api import PATH_CHARGE_MODE, PATH_DEVICE_STATUS, PATH_EMOBILITY_STATE
+from .smart_meter_ws import (
+    CH_CURRENT_L1,
+    CH_CURRENT_L2,
+    CH_CURRENT_L3,
+    CH_ENERGY_EXPORT,
+    CH_ENERGY_TOTAL,
+    CH_FREQUENCY,
+    CH_POWER_APPARENT,
+    CH_POWER_EXPORT,
+    CH_POWER_FACTOR,
+    CH_POWER_L1,
+    CH_POWER_L2,
+    CH_POWER_L3,
+    CH_POWER_TOTAL,
+    CH_REACTIVE_POWER,
+    CH_VOLTAGE_L1,
+    CH_VOLTAGE_L2,
+    CH_VOLTAGE_L3,
+    SMART_METER_CHANNELS,
+)
 
 
 @dataclass
 class EMSSensorEntityDescription(SensorEntityDescription):
-    """Extends SensorEntityDescription with a value extractor."""
+    """Extends SensorEntityDescription with a value extractor and deadband.
+
+    A new numeric value is only written when it differs from the last
+    written one by more than max(deadband_abs, deadband_rel * |last|).
+    A timer every max_silence seconds writes a value the deadband held
+    back, and rewrites the state when nothing was written for that long,
+    whether or not the coordinator notified in between.
+    Diagnostic sensors set metric_fn instead, which reads the coordinator's
+    runtime metrics rather than the data snapshot.
+    """
     value_fn: Callable[[EMSHomeData], float | int | str | None] = lambda _: None
+    metric_fn: Callable[[EMSHomeCoordinator], float | int | None] | None = None
+    deadband_abs: float = 0.0
+    deadband_rel: float = 0.0
+    max_silence: float = 300.0
+
+
+def _smart_meter_value(
+    channel: int, scale: float = 1, digits: int = 3
+) -> Callable[[EMSHomeData], float | None]:
+    """Build a value_fn reading a smart meter channel via the channel registry."""
+    field = SMART_METER_CHANNELS[channel].field
+
+    def _value(d: EMSHomeData) -> float | None:
+        if d.smart_meter is None:
+            return None
+        return round(getattr(d.smart_meter, field) / scale, digits)
+
+    return _value
+
+
+def _http_latency(path: str) -> Callable[[EMSHomeCoordinator], float | None]:
+    """p95 HTTP latency of *path* in milliseconds."""
+    def _value(c: EMSHomeCoordinator) -> float | None:
+        p95 = c.metrics.http_percentile(path, 95)
+        return None if p95 is None else round(p95 * 1000, 1)
+    return _value
+
+
+def _decode_time(stream: str) -> Callable[[EMSHomeCoordinator], float | None]:
+    """p95 decode time of one WS frame in microseconds."""
+    def _value(c: EMSHomeCoordinator) -> float | None:
+        p95 = c.metrics.stream(stream).decode.percentile(95)
+        return None if p95 is None else round(p95 * 1e6, 1)
+    return _value
+
+
+def _frame_rate(stream: str) -> Callable[[EMSHomeCoordinator], float]:
+    return lambda c: round(c.metrics.stream(stream).frame_rate.rate(), 2)
+
+
+def _frame_to_state(c: EMSHomeCoordinator) -> float | None:
+    p95 = c.metrics.stream("smart_meter").frame_to_state.percentile(95)
+    return None if p95 is None else round(p95 * 1000, 1)
 
 
 SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
@@ -40,6 +118,8 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:ev-station",
+        deadband_abs=0.01,
+        deadband_rel=0.01,
         value_fn=lambda d: round(d.emobility_state.ev_charging_power.total / 1_000_000, 3),
     ),
     EMSSensorEntityDescription(
@@ -50,6 +130,8 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:lightning-bolt",
         entity_registry_enabled_default=False,
+        deadband_abs=0.01,
+        deadband_rel=0.01,
         value_fn=lambda d: round(d.emobility_state.ev_charging_power.l1 / 1_000_000, 3),
     ),
     EMSSensorEntityDescription(
@@ -60,6 +142,8 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:lightning-bolt",
         entity_registry_enabled_default=False,
+        deadband_abs=0.01,
+        deadband_rel=0.01,
         value_fn=lambda d: round(d.emobility_state.ev_charging_power.l2 / 1_000_000, 3),
     ),
     EMSSensorEntityDescription(
@@ -70,6 +154,8 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:lightning-bolt",
         entity_registry_enabled_default=False,
+        deadband_abs=0.01,
+        deadband_rel=0.01,
         value_fn=lambda d: round(d.emobility_state.ev_charging_power.l3 / 1_000_000, 3),
     ),
     EMSSensorEntityDescription(
@@ -90,7 +176,9 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.POWER,
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:transmission-tower",
-        value_fn=lambda d: round(d.smart_meter.power_total / 1000, 3) if d.smart_meter else None,
+        deadband_abs=0.01,
+        deadband_rel=0.01,
+        value_fn=_smart_meter_value(CH_POWER_TOTAL, 1000),
     ),
     EMSSensorEntityDescription(
         key="grid_power_l1",
@@ -100,7 +188,9 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:lightning-bolt",
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.power_l1 / 1000, 3) if d.smart_meter else None,
+        deadband_abs=0.01,
+        deadband_rel=0.01,
+        value_fn=_smart_meter_value(CH_POWER_L1, 1000),
     ),
     EMSSensorEntityDescription(
         key="grid_power_l2",
@@ -110,7 +200,9 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:lightning-bolt",
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.power_l2 / 1000, 3) if d.smart_meter else None,
+        deadband_abs=0.01,
+        deadband_rel=0.01,
+        value_fn=_smart_meter_value(CH_POWER_L2, 1000),
     ),
     EMSSensorEntityDescription(
         key="grid_power_l3",
@@ -120,7 +212,9 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:lightning-bolt",
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.power_l3 / 1000, 3) if d.smart_meter else None,
+        deadband_abs=0.01,
+        deadband_rel=0.01,
+        value_fn=_smart_meter_value(CH_POWER_L3, 1000),
     ),
     EMSSensorEntityDescription(
         key="grid_apparent_power_total",
@@ -129,7 +223,9 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:transmission-tower",
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.power_apparent / 1000, 3) if d.smart_meter else None,
+        deadband_abs=0.01,
+        deadband_rel=0.01,
+        value_fn=_smart_meter_value(CH_POWER_APPARENT, 1000),
     ),
     EMSSensorEntityDescription(
         key="grid_voltage_l1",
@@ -138,7 +234,8 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.VOLTAGE,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.voltage_l1, 2) if d.smart_meter else None,
+        deadband_abs=0.5,
+        value_fn=_smart_meter_value(CH_VOLTAGE_L1, digits=2),
     ),
     EMSSensorEntityDescription(
         key="grid_voltage_l2",
@@ -147,7 +244,8 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.VOLTAGE,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.voltage_l2, 2) if d.smart_meter else None,
+        deadband_abs=0.5,
+        value_fn=_smart_meter_value(CH_VOLTAGE_L2, digits=2),
     ),
     EMSSensorEntityDescription(
         key="grid_voltage_l3",
@@ -156,7 +254,8 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.VOLTAGE,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.voltage_l3, 2) if d.smart_meter else None,
+        deadband_abs=0.5,
+        value_fn=_smart_meter_value(CH_VOLTAGE_L3, digits=2),
     ),
     EMSSensorEntityDescription(
         key="grid_current_l1",
@@ -165,7 +264,9 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.current_l1, 3) if d.smart_meter else None,
+        deadband_abs=0.05,
+        deadband_rel=0.01,
+        value_fn=_smart_meter_value(CH_CURRENT_L1),
     ),
     EMSSensorEntityDescription(
         key="grid_current_l2",
@@ -174,7 +275,9 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.current_l2, 3) if d.smart_meter else None,
+        deadband_abs=0.05,
+        deadband_rel=0.01,
+        value_fn=_smart_meter_value(CH_CURRENT_L2),
     ),
     EMSSensorEntityDescription(
         key="grid_current_l3",
@@ -183,7 +286,9 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.CURRENT,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.current_l3, 3) if d.smart_meter else None,
+        deadband_abs=0.05,
+        deadband_rel=0.01,
+        value_fn=_smart_meter_value(CH_CURRENT_L3),
     ),
     EMSSensorEntityDescription(
         key="grid_frequency",
@@ -192,7 +297,8 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.FREQUENCY,
         state_class=SensorStateClass.MEASUREMENT,
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.frequency, 3) if d.smart_meter else None,
+        deadband_abs=0.01,
+        value_fn=_smart_meter_value(CH_FREQUENCY),
     ),
     EMSSensorEntityDescription(
         key="grid_energy_import_total",
@@ -201,7 +307,7 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         device_class=SensorDeviceClass.ENERGY,
         state_class=SensorStateClass.TOTAL_INCREASING,
         icon="mdi:meter-electric",
-        value_fn=lambda d: round(d.smart_meter.energy_total, 3) if d.smart_meter else None,
+        value_fn=_smart_meter_value(CH_ENERGY_TOTAL),
     ),
     EMSSensorEntityDescription(
         key="grid_energy_export_total",
@@ -211,7 +317,7 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL_INCREASING,
         icon="mdi:meter-electric-outline",
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.energy_export, 3) if d.smart_meter else None,
+        value_fn=_smart_meter_value(CH_ENERGY_EXPORT),
     ),
     EMSSensorEntityDescription(
         key="grid_power_export",
@@ -221,7 +327,9 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:transmission-tower-export",
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.power_export / 1000, 3) if d.smart_meter else None,
+        deadband_abs=0.01,
+        deadband_rel=0.01,
+        value_fn=_smart_meter_value(CH_POWER_EXPORT, 1000),
     ),
     EMSSensorEntityDescription(
         key="grid_reactive_power",
@@ -230,7 +338,9 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:flash-triangle-outline",
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.reactive_power, 1) if d.smart_meter else None,
+        deadband_abs=10,
+        deadband_rel=0.01,
+        value_fn=_smart_meter_value(CH_REACTIVE_POWER, digits=1),
     ),
     EMSSensorEntityDescription(
         key="grid_power_factor",
@@ -238,18 +348,70 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:angle-acute",
         entity_registry_enabled_default=False,
-        value_fn=lambda d: round(d.smart_meter.power_factor, 3) if d.smart_meter else None,
+        deadband_abs=0.01,
+        value_fn=_smart_meter_value(CH_POWER_FACTOR),
+    ),
+    # ── integrated energy (from real-time power) ─────────────────────────────
+    EMSSensorEntityDescription(
+        key="grid_energy_import_integrated",
+        name="Grid Energy Import (Integrated)",
+        native_unit_of_measurement="kWh",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:counter",
+        deadband_abs=0.01,
+        value_fn=lambda d: round(d.energy.import_kwh, 3) if d.energy else None,
+    ),
+    EMSSensorEntityDescription(
+        key="grid_energy_export_integrated",
+        name="Grid Energy Export (Integrated)",
+        native_unit_of_measurement="kWh",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:counter",
+        entity_registry_enabled_default=False,
+        deadband_abs=0.01,
+        value_fn=lambda d: round(d.energy.export_kwh, 3) if d.energy else None,
+    ),
+    EMSSensorEntityDescription(
+        key="grid_energy_l1_integrated",
+        name="Grid Energy L1 (Integrated)",
+        native_unit_of_measurement="kWh",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:counter",
+        entity_registry_enabled_default=False,
+        deadband_abs=0.01,
+        value_fn=lambda d: round(d.energy.l1_kwh, 3) if d.energy else None,
+    ),
+    EMSSensorEntityDescription(
+        key="grid_energy_l2_integrated",
+        name="Grid Energy L2 (Integrated)",
+        native_unit_of_measurement="kWh",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:counter",
+        entity_registry_enabled_default=False,
+        deadband_abs=0.01,
+        value_fn=lambda d: round(d.energy.l2_kwh, 3) if d.energy else None,
+    ),
+    EMSSensorEntityDescription(
+        key="grid_energy_l3_integrated",
+        name="Grid Energy L3 (Integrated)",
+        native_unit_of_measurement="kWh",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:counter",
+        entity_registry_enabled_default=False,
+        deadband_abs=0.01,
+        value_fn=lambda d: round(d.energy.l3_kwh, 3) if d.energy else None,
     ),
     # ── EV charging state ────────────────────────────────────────────────────
     EMSSensorEntityDescription(
         key="ev_charging_state",
         name="EV Charging State",
         icon="mdi:ev-station",
-        value_fn=lambda d: (
-            "locked"   if d.charge_mode.mode == "lock" else
-            "charging" if d.emobility_state.ev_charging_power.total > 0 else
-            "idle"
-        ),
+        value_fn=lambda d: d.ev_charging_state,
     ),
     # ── charge mode ──────────────────────────────────────────────────────────
     EMSSensorEntityDescription(
@@ -273,6 +435,7 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         state_class=SensorStateClass.MEASUREMENT,
         icon="mdi:cpu-64-bit",
         entity_registry_enabled_default=False,
+        deadband_abs=2,
         value_fn=lambda d: d.device_status.cpu_load,
     ),
     EMSSensorEntityDescription(
@@ -341,6 +504,169 @@ SENSOR_DESCRIPTIONS: tuple[EMSSensorEntityDescription, ...] = (
         entity_registry_enabled_default=False,
         value_fn=lambda d: d.evse.evse_error_code if d.evse and d.evse.evse_error_code else "none",
     ),
+    EMSSensorEntityDescription(
+        key="evse_current_l1",
+        name="EV Charging Current L1",
+        native_unit_of_measurement="A",
+        device_class=SensorDeviceClass.CURRENT,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:current-ac",
+        entity_registry_enabled_default=False,
+        deadband_abs=0.05,
+        deadband_rel=0.01,
+        value_fn=lambda d: round(d.evse.current_l1, 2) if d.evse and d.evse.has_measurements else None,
+    ),
+    EMSSensorEntityDescription(
+        key="evse_current_l2",
+        name="EV Charging Current L2",
+        native_unit_of_measurement="A",
+        device_class=SensorDeviceClass.CURRENT,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:current-ac",
+        entity_registry_enabled_default=False,
+        deadband_abs=0.05,
+        deadband_rel=0.01,
+        value_fn=lambda d: round(d.evse.current_l2, 2) if d.evse and d.evse.has_measurements else None,
+    ),
+    EMSSensorEntityDescription(
+        key="evse_current_l3",
+        name="EV Charging Current L3",
+        native_unit_of_measurement="A",
+        device_class=SensorDeviceClass.CURRENT,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:current-ac",
+        entity_registry_enabled_default=False,
+        deadband_abs=0.05,
+        deadband_rel=0.01,
+        value_fn=lambda d: round(d.evse.current_l3, 2) if d.evse and d.evse.has_measurements else None,
+    ),
+    EMSSensorEntityDescription(
+        key="evse_energy_total",
+        name="Wallbox Energy",
+        native_unit_of_measurement="kWh",
+        device_class=SensorDeviceClass.ENERGY,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:ev-station",
+        entity_registry_enabled_default=False,
+        deadband_abs=0.01,
+        value_fn=lambda d: d.evse.energy_total_kwh if d.evse and d.evse.has_measurements else None,
+    ),
+    # ── performance diagnostics ──────────────────────────────────────────────
+    EMSSensorEntityDescription(
+        key="http_latency_device_status",
+        name="HTTP Latency Device Status",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-sand",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        deadband_rel=0.1,
+        metric_fn=_http_latency(PATH_DEVICE_STATUS),
+    ),
+    EMSSensorEntityDescription(
+        key="http_latency_emobility_state",
+        name="HTTP Latency E-Mobility State",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-sand",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        deadband_rel=0.1,
+        metric_fn=_http_latency(PATH_EMOBILITY_STATE),
+    ),
+    EMSSensorEntityDescription(
+        key="http_latency_charge_mode",
+        name="HTTP Latency Charge Mode",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-sand",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        deadband_rel=0.1,
+        metric_fn=_http_latency(PATH_CHARGE_MODE),
+    ),
+    EMSSensorEntityDescription(
+        key="http_logins",
+        name="HTTP Logins",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:login",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        metric_fn=lambda c: c.metrics.logins,
+    ),
+    EMSSensorEntityDescription(
+        key="http_unauthorized_retries",
+        name="HTTP 401 Retries",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:lock-reset",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        metric_fn=lambda c: c.metrics.unauthorized_retries,
+    ),
+    EMSSensorEntityDescription(
+        key="ws_smart_meter_frame_rate",
+        name="Smart Meter Frame Rate",
+        native_unit_of_measurement="frames/s",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:speedometer",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        deadband_abs=0.05,
+        metric_fn=_frame_rate("smart_meter"),
+    ),
+    EMSSensorEntityDescription(
+        key="ws_evse_frame_rate",
+        name="Wallbox Frame Rate",
+        native_unit_of_measurement="frames/s",
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:speedometer",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        deadband_abs=0.05,
+        metric_fn=_frame_rate("evse"),
+    ),
+    EMSSensorEntityDescription(
+        key="ws_smart_meter_decode_time",
+        name="Smart Meter Decode Time",
+        native_unit_of_measurement=UnitOfTime.MICROSECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-cog-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        deadband_rel=0.1,
+        metric_fn=_decode_time("smart_meter"),
+    ),
+    EMSSensorEntityDescription(
+        key="ws_evse_decode_time",
+        name="Wallbox Decode Time",
+        native_unit_of_measurement=UnitOfTime.MICROSECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-cog-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        deadband_rel=0.1,
+        metric_fn=_decode_time("evse"),
+    ),
+    EMSSensorEntityDescription(
+        key="ws_reconnects",
+        name="WebSocket Reconnects",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        icon="mdi:connection",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        metric_fn=lambda c: sum(s.reconnects for s in c.stream_stats.values()),
+    ),
+    EMSSensorEntityDescription(
+        key="ws_frame_to_state_latency",
+        name="Frame to State Latency",
+        native_unit_of_measurement=UnitOfTime.MILLISECONDS,
+        state_class=SensorStateClass.MEASUREMENT,
+        icon="mdi:timer-play-outline",
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        deadband_rel=0.1,
+        metric_fn=_frame_to_state,
+    ),
 )
 
 
@@ -381,15 +707,80 @@ class EMSHomeSensor(CoordinatorEntity[EMSHomeCoordinator], SensorEntity):
             configuration_url=f"http://{entry.data['host']}:{entry.data.get('port', 80)}",
             model_id="ems-home",
         )
+        self._attr_native_value = self._compute_value()
+        self._written: tuple[bool, bool, float | int | str | None] | None = None
+        self._written_at: float = 0.0
 
-    @property
-    def native_value(self) -> float | int | str | None:
+    def _compute_value(self) -> float | int | str | None:
+        desc = self.entity_description
+        if desc.metric_fn is not None:
+            return desc.metric_fn(self.coordinator)
         data = self.coordinator.data
         if data is None:
             return None
         try:
-            data.smart_meter = self.coordinator.get_fresh_smart_meter()
-            data.evse = self.coordinator.get_fresh_evse()
-            return self.entity_description.value_fn(data)
+            return desc.value_fn(data)
         except Exception:
             return None
+
+    @property
+    def _stale(self) -> bool:
+        data = self.coordinator.data
+        return data is not None and data.stale and self.entity_description.metric_fn is None
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any] | None:
+        """Flag values restored from the last run until the first poll."""
+        return {"stale": True} if self._stale else None
+
+    async def async_added_to_hass(self) -> None:
+        await super().async_added_to_hass()
+        self.async_on_remove(
+            async_track_time_interval(
+                self.hass,
+                self._async_heartbeat,
+                timedelta(seconds=self.entity_description.max_silence),
+            )
+        )
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Write state only when the value leaves the deadband or goes stale."""
+        value = self._compute_value()
+        state = (self.available, self._stale, value)
+        if self._written is not None and not self._exceeds_deadband(self._written, state):
+            return
+        self._write(state)
+
+    @callback
+    def _async_heartbeat(self, _now: datetime) -> None:
+        """Flush a value held back by the deadband, or refresh a silent state.
+
+        Runs on its own timer: the coordinator does not notify when a poll
+        returns unchanged data, so coordinator updates cannot drive this.
+        """
+        state = (self.available, self._stale, self._compute_value())
+        if (
+            state == self._written
+            and time.monotonic() - self._written_at < self.entity_description.max_silence
+        ):
+            return
+        self._write(state)
+
+    @callback
+    def _write(self, state: tuple[bool, bool, float | int | str | None]) -> None:
+        self._attr_native_value = state[2]
+        self._written = state
+        self._written_at = time.monotonic()
+        self.async_write_ha_state()
+
+    def _exceeds_deadband(self, old: tuple, new: tuple) -> bool:
+        (old_avail, old_stale, old_value), (new_avail, new_stale, new_value) = old, new
+        if old_avail != new_avail or old_stale != new_stale:
+            return True
+        desc = self.entity_description
+        if isinstance(old_value, (int, float)) and isinstance(new_value, (int, float)):
+            threshold = max(desc.deadband_abs, desc.deadband_rel * abs(old_value))
+            delta = abs(new_value - old_value)
+            return delta > threshold if threshold else delta != 0
+        return old_value != new_value
@@ -1,20 +1,18 @@
 """
-eMS Home – Smart Meter WebSocket client.
+eMS Home – Smart Meter stream decoder.
 
-Connects to ws://<host>/api/data-transfer/ws/protobuf/gdr/local/values/smart-meter
-and decodes the binary protobuf frames into a SmartMeterReading dataclass.
-Uses only stdlib asyncio — no external websockets library required.
+Frames from ws://<host>/api/data-transfer/ws/protobuf/gdr/local/values/smart-meter
+(see ws_stream.WSStreamManager) are decoded into a SmartMeterReading
+dataclass.  Also hosts the minimal protobuf decoder shared by all streams.
 """
 from __future__ import annotations
 
-import asyncio
-import base64
-import hashlib
 import logging
-import os
 import struct
 from dataclasses import dataclass
-from typing import Callable, Optional
+from typing import Iterator, NamedTuple, Optional, Union
+
+from .ws_stream import WS_BASE_PATH
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -53,7 +51,45 @@ CH_REACTIVE_L2      = 0x1002C0400FF   # Reactive power L2 (var)
 CH_REACTIVE_L3      = 0x100400400FF   # Reactive power L3 (var)
 
 
-@dataclass
+class ChannelSpec(NamedTuple):
+    """Where a channel's raw integer value lands on SmartMeterReading."""
+    field: str
+    divisor: float
+
+
+# Single source of truth for channel id -> (reading field, raw scale divisor).
+# Used by the frame decoder and by the sensor platform.
+SMART_METER_CHANNELS: dict[int, ChannelSpec] = {
+    CH_POWER_TOTAL:     ChannelSpec("power_total",     1000),
+    CH_POWER_APPARENT:  ChannelSpec("power_apparent",  1000),
+    CH_POWER_L1:        ChannelSpec("power_l1",        1000),
+    CH_POWER_L2:        ChannelSpec("power_l2",        1000),
+    CH_POWER_L3:        ChannelSpec("power_l3",        1000),
+    CH_APPARENT_L1:     ChannelSpec("apparent_l1",     1000),
+    CH_APPARENT_L2:     ChannelSpec("apparent_l2",     1000),
+    CH_APPARENT_L3:     ChannelSpec("apparent_l3",     1000),
+    CH_VOLTAGE_L1:      ChannelSpec("voltage_l1",      1000),
+    CH_VOLTAGE_L2:      ChannelSpec("voltage_l2",      1000),
+    CH_VOLTAGE_L3:      ChannelSpec("voltage_l3",      1000),
+    CH_CURRENT_L1:      ChannelSpec("current_l1",      1000),
+    CH_CURRENT_L2:      ChannelSpec("current_l2",      1000),
+    CH_CURRENT_L3:      ChannelSpec("current_l3",      1000),
+    CH_FREQUENCY:       ChannelSpec("frequency",       1000),
+    CH_ENERGY_TOTAL:    ChannelSpec("energy_total",    1e6),
+    CH_POWER_EXPORT:    ChannelSpec("power_export",    1000),
+    CH_ENERGY_EXPORT:   ChannelSpec("energy_export",   1e6),
+    CH_REACTIVE_POWER:  ChannelSpec("reactive_power",  1000),
+    CH_REACTIVE_L1:     ChannelSpec("reactive_l1",     1000),
+    CH_REACTIVE_L2:     ChannelSpec("reactive_l2",     1000),
+    CH_REACTIVE_L3:     ChannelSpec("reactive_l3",     1000),
+    CH_POWER_FACTOR:    ChannelSpec("power_factor",    1000),
+    CH_POWER_FACTOR_L1: ChannelSpec("power_factor_l1", 1000),
+    CH_POWER_FACTOR_L2: ChannelSpec("power_factor_l2", 1000),
+    CH_POWER_FACTOR_L3: ChannelSpec("power_factor_l3", 1000),
+}
+
+
+@dataclass(slots=True)
 class SmartMeterReading:
     """Decoded smart meter snapshot from one WebSocket frame."""
     power_total:    float = 0.0
@@ -83,7 +119,8 @@ class SmartMeterReading:
     power_factor_l1: float = 0.0
     power_factor_l2: float = 0.0
     power_factor_l3: float = 0.0
-    timestamp:      float = 0.0
+    timestamp:      float = 0.0     # device time (epoch seconds)
+    received_at:    float = 0.0     # time.monotonic() when delivered
 
     @property
     def power_total_kw(self) -> float:
@@ -94,257 +131,168 @@ class SmartMeterReading:
 # Minimal protobuf decoder
 # ---------------------------------------------------------------------------
 
-def _decode_varint(data: bytes, pos: int) -> tuple[int, int]:
-    result, shift = 0, 0
+_UNPACK_FIXED32 = struct.Struct("<I").unpack_from
+_UNPACK_FIXED64 = struct.Struct("<Q").unpack_from
+
+
+def _decode_varint(data, pos: int) -> tuple[int, int]:
+    b = data[pos]
+    if b < 0x80:
+        return b, pos + 1
+    result, shift = b & 0x7F, 7
     while True:
-        b = data[pos]; pos += 1
+        pos += 1
+        b = data[pos]
+        if b < 0x80:
+            return result | (b << shift), pos + 1
         result |= (b & 0x7F) << shift
-        if not (b & 0x80):
-            break
         shift += 7
-    return result, pos
 
 
-def _decode_fields(data: bytes) -> list:
-    pos, fields = 0, []
-    while pos < len(data):
+def _iter_fields(data) -> Iterator[tuple[int, int, Union[int, memoryview]]]:
+    """Stream (field, wiretype, value) tuples from a protobuf message.
+
+    Length-delimited values are yielded as memoryview slices of *data*, so
+    nested messages are never copied.  Callers may stop iterating as soon as
+    they have what they need.  Decoding stops at the first group (wire
+    types 3/4) or unknown wire type, or at a truncated field.
+    """
+    view = data if isinstance(data, memoryview) else memoryview(data)
+    pos, end = 0, len(view)
+    while pos < end:
         try:
-            tag, pos = _decode_varint(data, pos)
-        except IndexError:
-            break
-        fn, wt = tag >> 3, tag & 7
-        if wt == 0:
-            v, pos = _decode_varint(data, pos)
-            fields.append((fn, wt, v))
-        elif wt == 2:
-            l, pos = _decode_varint(data, pos)
-            fields.append((fn, wt, data[pos: pos + l]))
-            pos += l
-        elif wt == 5:
-            v = struct.unpack_from("<I", data, pos)[0]
-            pos += 4
-            fields.append((fn, wt, v))
-        else:
-            break
-    return fields
+            # Fast path: tags and small varints almost always fit one byte
+            tag = view[pos]
+            if tag & 0x80:
+                tag, pos = _decode_varint(view, pos)
+            else:
+                pos += 1
+            wt = tag & 7
+            if wt == 0:
+                v = view[pos]
+                if v & 0x80:
+                    v, pos = _decode_varint(view, pos)
+                else:
+                    pos += 1
+            elif wt == 2:
+                l = view[pos]
+                if l & 0x80:
+                    l, pos = _decode_varint(view, pos)
+                else:
+                    pos += 1
+                if pos + l > end:
+                    return
+                v = view[pos: pos + l]
+                pos += l
+            elif wt == 5:
+                v = _UNPACK_FIXED32(view, pos)[0]
+                pos += 4
+            elif wt == 1:
+                v = _UNPACK_FIXED64(view, pos)[0]
+                pos += 8
+            else:
+                return
+        except (IndexError, struct.error):
+            return
+        yield tag >> 3, wt, v
+
+
+def _find_field(data, field: int, wiretype: int):
+    """Return the first value of *field* with *wiretype*, or None."""
+    for fn, wt, v in _iter_fields(data):
+        if fn == field and wt == wiretype:
+            return v
+    return None
+
+
+def _decode_fields(data) -> list:
+    """Eagerly decode every top-level field (see _iter_fields)."""
+    return list(_iter_fields(data))
+
+
+def _decode_datapoint(view: memoryview) -> tuple[Optional[int], Optional[int]]:
+    """Return (channel id, raw value) from a data point sub-message.
+
+    Straight-line equivalent of scanning _iter_fields for the first varint
+    fields 1 and 2; this runs once per channel per frame.
+    """
+    ch_id = raw_v = None
+    pos, end = 0, len(view)
+    try:
+        while pos < end:
+            tag = view[pos]
+            if tag & 0x80:
+                tag, pos = _decode_varint(view, pos)
+            else:
+                pos += 1
+            wt = tag & 7
+            if wt == 0:
+                v, pos = _decode_varint(view, pos)
+                fn = tag >> 3
+                if fn == 1:
+                    if ch_id is None:
+                        ch_id = v
+                elif fn == 2:
+                    if raw_v is None:
+                        raw_v = v
+                if ch_id is not None and raw_v is not None:
+                    break
+            elif wt == 2:
+                l, pos = _decode_varint(view, pos)
+                pos += l
+            elif wt == 5:
+                pos += 4
+            elif wt == 1:
+                pos += 8
+            else:
+                break
+    except IndexError:
+        pass
+    return ch_id, raw_v
+
+
+def _decode_timestamp(data) -> float:
+    sec = ns = 0
+    for f, wt, val in _iter_fields(data):
+        if wt != 0:
+            continue
+        if f == 1:
+            sec = val
+        elif f == 2:
+            ns = val
+    return sec + ns / 1e9
 
 
 def decode_smart_meter_frame(raw: bytes) -> Optional[SmartMeterReading]:
     try:
-        outer = _decode_fields(raw)
-        wrapper_bytes = next((v for fn, wt, v in outer if fn == 1 and wt == 2), None)
-        if wrapper_bytes is None:
+        wrapper = _find_field(raw, 1, 2)
+        if wrapper is None:
             return None
-        wrapper = _decode_fields(wrapper_bytes)
-        payload_bytes = next((v for fn, wt, v in wrapper if fn == 2 and wt == 2), None)
-        if payload_bytes is None:
+        payload = _find_field(wrapper, 2, 2)
+        if payload is None:
             return None
 
         reading = SmartMeterReading()
-        for fn, wt, v in _decode_fields(payload_bytes):
-            if fn == 3 and wt == 2:
-                tsf = _decode_fields(v)
-                sec = next((val for f, _, val in tsf if f == 1), 0)
-                ns  = next((val for f, _, val in tsf if f == 2), 0)
-                reading.timestamp = sec + ns / 1e9
-            elif fn == 4 and wt == 2:
-                dp    = _decode_fields(v)
-                ch_id = next((val for f, _, val in dp if f == 1), None)
-                raw_v = next((val for f, _, val in dp if f == 2), None)
+        channels = SMART_METER_CHANNELS
+        for fn, wt, v in _iter_fields(payload):
+            if wt != 2:
+                continue
+            if fn == 4:
+                ch_id, raw_v = _decode_datapoint(v)
                 if ch_id is not None and raw_v is not None:
-                    _apply_channel(reading, ch_id, raw_v)
+                    spec = channels.get(ch_id)
+                    if spec is not None:
+                        setattr(reading, spec.field, raw_v / spec.divisor)
+            elif fn == 3:
+                reading.timestamp = _decode_timestamp(v)
         return reading
     except Exception as exc:
         _LOGGER.debug("Failed to decode smart meter frame: %s", exc)
         return None
 
 
-def _apply_channel(reading: SmartMeterReading, ch_id: int, raw: int) -> None:
-    if   ch_id == CH_POWER_TOTAL:    reading.power_total    = raw / 1000
-    elif ch_id == CH_POWER_APPARENT: reading.power_apparent = raw / 1000
-    elif ch_id == CH_POWER_L1:       reading.power_l1       = raw / 1000
-    elif ch_id == CH_POWER_L2:       reading.power_l2       = raw / 1000
-    elif ch_id == CH_POWER_L3:       reading.power_l3       = raw / 1000
-    elif ch_id == CH_APPARENT_L1:    reading.apparent_l1    = raw / 1000
-    elif ch_id == CH_APPARENT_L2:    reading.apparent_l2    = raw / 1000
-    elif ch_id == CH_APPARENT_L3:    reading.apparent_l3    = raw / 1000
-    elif ch_id == CH_VOLTAGE_L1:     reading.voltage_l1     = raw / 1000
-    elif ch_id == CH_VOLTAGE_L2:     reading.voltage_l2     = raw / 1000
-    elif ch_id == CH_VOLTAGE_L3:     reading.voltage_l3     = raw / 1000
-    elif ch_id == CH_CURRENT_L1:     reading.current_l1     = raw / 1000
-    elif ch_id == CH_CURRENT_L2:     reading.current_l2     = raw / 1000
-    elif ch_id == CH_CURRENT_L3:     reading.current_l3     = raw / 1000
-    elif ch_id == CH_FREQUENCY:      reading.frequency      = raw / 1000
-    elif ch_id == CH_ENERGY_TOTAL:   reading.energy_total   = raw / 1e6
-    # Additional channels
-    elif ch_id == CH_POWER_EXPORT:   reading.power_export   = raw / 1000
-    elif ch_id == CH_ENERGY_EXPORT:  reading.energy_export  = raw / 1e6
-    elif ch_id == CH_REACTIVE_POWER: reading.reactive_power = raw / 1000
-    elif ch_id == CH_REACTIVE_L1:    reading.reactive_l1    = raw / 1000
-    elif ch_id == CH_REACTIVE_L2:    reading.reactive_l2    = raw / 1000
-    elif ch_id == CH_REACTIVE_L3:    reading.reactive_l3    = raw / 1000
-    elif ch_id == CH_POWER_FACTOR:   reading.power_factor   = raw / 1000
-    elif ch_id == CH_POWER_FACTOR_L1: reading.power_factor_l1 = raw / 1000
-    elif ch_id == CH_POWER_FACTOR_L2: reading.power_factor_l2 = raw / 1000
-    elif ch_id == CH_POWER_FACTOR_L3: reading.power_factor_l3 = raw / 1000
-
-
 # ---------------------------------------------------------------------------
-# Raw asyncio WebSocket helpers
+# Stream registration
 # ---------------------------------------------------------------------------
 
-async def _ws_open(host: str, port: int, path: str, auth_token: str):
-    import ssl as _ssl
-    if port == 443:
-        sc = _ssl.create_default_context()
-        sc.check_hostname = False
-        sc.verify_mode = _ssl.CERT_NONE
-        reader, writer = await asyncio.open_connection(host, port, ssl=sc)
-    else:
-        reader, writer = await asyncio.open_connection(host, port)
-    key = base64.b64encode(os.urandom(16)).decode()
-    request = (
-        f"GET {path} HTTP/1.1\r\n"
-        f"Host: {host}:{port}\r\n"
-        f"Upgrade: websocket\r\n"
-        f"Connection: Upgrade\r\n"
-        f"Sec-WebSocket-Key: {key}\r\n"
-        f"Sec-WebSocket-Version: 13\r\n"
-        f"Authorization: Bearer {auth_token}\r\n"
-        f"\r\n"
-    )
-    writer.write(request.encode())
-    await writer.drain()
-
-    response = b""
-    while b"\r\n\r\n" not in response:
-        chunk = await reader.read(4096)
-        if not chunk:
-            raise ConnectionError("Connection closed during WebSocket handshake")
-        response += chunk
-
-    status_line = response.split(b"\r\n")[0].decode()
-    if "101" not in status_line:
-        raise ConnectionError(f"WebSocket upgrade failed: {status_line}")
-
-    return reader, writer
-
-
-def _send_ws_text(writer, text: str) -> None:
-    payload = text.encode()
-    mask_key = os.urandom(4)
-    masked = bytes(b ^ mask_key[i % 4] for i, b in enumerate(payload))
-    length = len(payload)
-    if length < 126:
-        header = bytes([0x81, 0x80 | length])
-    else:
-        header = bytes([0x81, 0xFE]) + struct.pack(">H", length)
-    writer.write(header + mask_key + masked)
-
-
-async def _ws_recv_frame(reader) -> bytes:
-    header = await reader.readexactly(2)
-    opcode  = header[0] & 0x0F
-    masked  = (header[1] & 0x80) != 0
-    length  = header[1] & 0x7F
-
-    if length == 126:
-        length = struct.unpack(">H", await reader.readexactly(2))[0]
-    elif length == 127:
-        length = struct.unpack(">Q", await reader.readexactly(8))[0]
-
-    mask_key = await reader.readexactly(4) if masked else b""
-    payload  = await reader.readexactly(length)
-
-    if masked:
-        payload = bytes(b ^ mask_key[i % 4] for i, b in enumerate(payload))
-
-    if opcode == 0x8:
-        raise ConnectionError("Server sent WebSocket close frame")
-    if opcode in (0x9, 0xA):
-        return await _ws_recv_frame(reader)
-
-    return payload
-
-
-async def _ws_close(writer) -> None:
-    try:
-        writer.write(b"\x88\x80" + os.urandom(4))
-        await writer.drain()
-        writer.close()
-        await writer.wait_closed()
-    except Exception:
-        pass
-
-
-# ---------------------------------------------------------------------------
-# Async WebSocket client
-# ---------------------------------------------------------------------------
-
-WS_PATH = "/api/data-transfer/ws/protobuf/gdr/local/values/smart-meter"
-
-
-class SmartMeterWebSocket:
-    """Persistent WebSocket connection with auto-reconnect."""
-
-    def __init__(
-        self,
-        host: str,
-        token: str,
-        on_reading: Callable[[SmartMeterReading], None],
-        port: int = 80,
-    ) -> None:
-        self._host     = host
-        self._port     = port
-        self._token    = token
-        self._callback = on_reading
-        self._task: Optional[asyncio.Task] = None
-        self._running  = False
-
-    def update_token(self, token: str) -> None:
-        self._token = token
-
-    async def start(self) -> None:
-        self._running = True
-        self._task = asyncio.create_task(self._run_loop())
-
-    async def stop(self) -> None:
-        self._running = False
-        if self._task:
-            self._task.cancel()
-            try:
-                await self._task
-            except asyncio.CancelledError:
-                pass
-
-    async def _run_loop(self) -> None:
-        delay = 1.0
-        while self._running:
-            try:
-                await self._connect_and_listen()
-                delay = 1.0
-            except asyncio.CancelledError:
-                break
-            except Exception as exc:
-                _LOGGER.warning(
-                    "Smart meter WebSocket error (%s), reconnecting in %.0fs", exc, delay
-                )
-                await asyncio.sleep(delay)
-                delay = min(delay * 2, 60.0)
-
-    async def _connect_and_listen(self) -> None:
-        reader, writer = await _ws_open(
-            self._host, self._port, WS_PATH, self._token
-        )
-        _LOGGER.info("Smart meter WebSocket connected")
-        _send_ws_text(writer, f"Bearer {self._token}")
-        await writer.drain()
-        try:
-            while self._running:
-                payload = await _ws_recv_frame(reader)
-                reading = decode_smart_meter_frame(payload)
-                if reading is not None:
-                    self._callback(reading)
-        finally:
-            await _ws_close(writer)
-
+WS_PATH = WS_BASE_PATH + "smart-meter"
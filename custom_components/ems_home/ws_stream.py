@@ -0,0 +1,465 @@
+"""
+eMS Home – shared WebSocket transport.
+
+One WSStreamManager per hub owns every subscribed data-transfer stream
+(smart meter, EVSE, ...).  All streams share the TLS context, the current
+access token and a single jittered reconnect backoff, and report per-stream
+connection state and counters.  An optional semaphore shared between
+managers caps concurrent handshakes across hubs.  Uses only stdlib asyncio.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import contextlib
+import logging
+import os
+import random
+import ssl
+import struct
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import TYPE_CHECKING, Any, Callable, Optional
+
+if TYPE_CHECKING:
+    from .capture import CaptureWriter
+    from .metrics import EMSHomeMetrics
+
+_LOGGER = logging.getLogger(__name__)
+
+WS_BASE_PATH = "/api/data-transfer/ws/protobuf/gdr/local/values/"
+
+STATE_STOPPED    = "stopped"
+STATE_CONNECTING = "connecting"
+STATE_CONNECTED  = "connected"
+STATE_BACKOFF    = "backoff"
+
+_BACKOFF_BASE = 1.0
+_BACKOFF_MAX  = 60.0
+
+# Connect plus HTTP upgrade; bounds how long a hub that accepts but never
+# answers can hold a fleet handshake slot
+_HANDSHAKE_TIMEOUT = 10.0
+
+
+# ---------------------------------------------------------------------------
+# Raw asyncio WebSocket helpers
+# ---------------------------------------------------------------------------
+
+@lru_cache(maxsize=1)
+def client_ssl_context() -> ssl.SSLContext:
+    """TLS context for the device's self-signed certificate, built once."""
+    sc = ssl.create_default_context()
+    sc.check_hostname = False
+    sc.verify_mode = ssl.CERT_NONE
+    return sc
+
+
+OP_CONTINUATION = 0x0
+OP_TEXT         = 0x1
+OP_BINARY       = 0x2
+OP_CLOSE        = 0x8
+OP_PING         = 0x9
+OP_PONG         = 0xA
+
+_MAX_MESSAGE_SIZE = 16 * 1024 * 1024
+_READ_CHUNK       = 64 * 1024
+_CLOSE_TIMEOUT    = 2.0
+
+
+class WSClosedError(ConnectionError):
+    """The peer sent a close frame (or the close handshake completed)."""
+
+    def __init__(self, code: Optional[int], reason: str = "") -> None:
+        super().__init__(f"WebSocket closed by server (code={code} {reason})".strip())
+        self.code = code
+
+
+def _apply_mask(payload, mask_key: bytes) -> bytes:
+    """XOR *payload* with the 4-byte mask as one big integer operation."""
+    n = len(payload)
+    if not n:
+        return b""
+    key = (mask_key * (n // 4 + 1))[:n]
+    return (
+        int.from_bytes(payload, "little") ^ int.from_bytes(key, "little")
+    ).to_bytes(n, "little")
+
+
+def _encode_frame(opcode: int, payload: bytes, fin: bool = True) -> bytes:
+    """Build a masked client-to-server frame (RFC 6455 §5.2)."""
+    mask_key = os.urandom(4)
+    length = len(payload)
+    b0 = (0x80 if fin else 0) | opcode
+    if length < 126:
+        header = struct.pack("!BB", b0, 0x80 | length)
+    elif length < 0x10000:
+        header = struct.pack("!BBH", b0, 0x80 | 126, length)
+    else:
+        header = struct.pack("!BBQ", b0, 0x80 | 127, length)
+    return header + mask_key + _apply_mask(payload, mask_key)
+
+
+class WSConnection:
+    """Client side of an upgraded WebSocket connection.
+
+    Incoming bytes are read in bulk into one buffer and frames are parsed
+    out of it, so a burst of queued frames costs one read() rather than
+    three readexactly() calls per frame.  recv() reassembles fragmented
+    messages, answers pings, and completes the close handshake.
+    """
+
+    def __init__(self, reader, writer, initial: bytes = b"") -> None:
+        self._reader = reader
+        self._writer = writer
+        self._buf = bytearray(initial)
+        self._close_sent = False
+
+    async def _fill(self, n: int) -> None:
+        """Ensure at least *n* bytes are buffered."""
+        buf = self._buf
+        while len(buf) < n:
+            chunk = await self._reader.read(max(_READ_CHUNK, n - len(buf)))
+            if not chunk:
+                raise asyncio.IncompleteReadError(bytes(buf), n)
+            buf += chunk
+
+    async def _read_frame(self) -> tuple[bool, int, bytes]:
+        buf = self._buf
+        await self._fill(2)
+        b0, b1 = buf[0], buf[1]
+        length = b1 & 0x7F
+        pos = 2
+        if length == 126:
+            await self._fill(4)
+            length = struct.unpack_from("!H", buf, 2)[0]
+            pos = 4
+        elif length == 127:
+            await self._fill(10)
+            length = struct.unpack_from("!Q", buf, 2)[0]
+            pos = 10
+        if length > _MAX_MESSAGE_SIZE:
+            raise ConnectionError(f"WebSocket frame too large ({length} bytes)")
+        masked = b1 & 0x80
+        if masked:
+            await self._fill(pos + 4 + length)
+            mask_key = bytes(buf[pos:pos + 4])
+            pos += 4
+            payload = _apply_mask(buf[pos:pos + length], mask_key)
+        else:
+            await self._fill(pos + length)
+            payload = bytes(buf[pos:pos + length])
+        # Deleting from the front of a bytearray is amortised O(1)
+        del buf[:pos + length]
+        return bool(b0 & 0x80), b0 & 0x0F, payload
+
+    async def recv(self) -> bytes:
+        """Return the next complete text/binary message payload."""
+        fragments: Optional[list[bytes]] = None
+        size = 0
+        while True:
+            fin, opcode, payload = await self._read_frame()
+            if opcode >= 0x8:
+                await self._handle_control(opcode, payload)
+                continue
+            if opcode == OP_CONTINUATION:
+                if fragments is None:
+                    raise ConnectionError("Unexpected WebSocket continuation frame")
+                fragments.append(payload)
+                size += len(payload)
+            elif fragments is not None:
+                raise ConnectionError("WebSocket data frame inside fragmented message")
+            elif fin:
+                return payload
+            else:
+                fragments, size = [payload], len(payload)
+            if size > _MAX_MESSAGE_SIZE:
+                raise ConnectionError(f"WebSocket message too large ({size} bytes)")
+            if fin:
+                return b"".join(fragments)
+
+    async def _handle_control(self, opcode: int, payload: bytes) -> None:
+        if opcode == OP_PING:
+            self._writer.write(_encode_frame(OP_PONG, payload))
+            await self._writer.drain()
+        elif opcode == OP_CLOSE:
+            code = struct.unpack_from("!H", payload)[0] if len(payload) >= 2 else None
+            reason = payload[2:].decode("utf-8", errors="replace")
+            if not self._close_sent:
+                self._close_sent = True
+                self._writer.write(_encode_frame(OP_CLOSE, payload[:2]))
+                await self._writer.drain()
+            raise WSClosedError(code, reason)
+        # OP_PONG and reserved control opcodes are ignored
+
+    def send(self, opcode: int, payload: bytes) -> None:
+        self._writer.write(_encode_frame(opcode, payload))
+
+    def send_text(self, text: str) -> None:
+        self.send(OP_TEXT, text.encode())
+
+    async def drain(self) -> None:
+        await self._writer.drain()
+
+    async def close(self, code: int = 1000) -> None:
+        """Send a close frame, wait briefly for the reply, then drop the socket."""
+        writer = self._writer
+        try:
+            if not self._close_sent:
+                self._close_sent = True
+                writer.write(_encode_frame(OP_CLOSE, struct.pack("!H", code)))
+                await writer.drain()
+                async with asyncio.timeout(_CLOSE_TIMEOUT):
+                    while True:
+                        _, opcode, _ = await self._read_frame()
+                        if opcode == OP_CLOSE:
+                            break
+        except Exception:
+            pass
+        try:
+            writer.close()
+            await writer.wait_closed()
+        except Exception:
+            pass
+
+
+async def _ws_open(host: str, port: int, path: str, auth_token: str) -> WSConnection:
+    if port == 443:
+        reader, writer = await asyncio.open_connection(
+            host, port, ssl=client_ssl_context()
+        )
+    else:
+        reader, writer = await asyncio.open_connection(host, port)
+    key = base64.b64encode(os.urandom(16)).decode()
+    request = (
+        f"GET {path} HTTP/1.1\r\n"
+        f"Host: {host}:{port}\r\n"
+        f"Upgrade: websocket\r\n"
+        f"Connection: Upgrade\r\n"
+        f"Sec-WebSocket-Key: {key}\r\n"
+        f"Sec-WebSocket-Version: 13\r\n"
+        f"Authorization: Bearer {auth_token}\r\n"
+        f"\r\n"
+    )
+    try:
+        writer.write(request.encode())
+        await writer.drain()
+
+        response = b""
+        while b"\r\n\r\n" not in response:
+            chunk = await reader.read(4096)
+            if not chunk:
+                raise ConnectionError("Connection closed during WebSocket handshake")
+            response += chunk
+
+        head, _, rest = response.partition(b"\r\n\r\n")
+        status_line = head.split(b"\r\n")[0].decode()
+        if "101" not in status_line:
+            raise ConnectionError(f"WebSocket upgrade failed: {status_line}")
+    except BaseException:
+        # Including cancellation by the handshake timeout
+        writer.close()
+        raise
+
+    # Frames may arrive in the same segment as the handshake response
+    return WSConnection(reader, writer, rest)
+
+
+# ---------------------------------------------------------------------------
+# Stream manager
+# ---------------------------------------------------------------------------
+
+@dataclass
+class StreamStats:
+    """Connection state and counters for one registered stream."""
+    state: str = STATE_STOPPED
+    frames: int = 0
+    decode_failures: int = 0
+    connects: int = 0
+    reconnects: int = 0
+    last_frame_at: float = 0.0      # time.monotonic()
+    connected_since: float = 0.0    # time.monotonic()
+    last_error: Optional[str] = None
+
+
+@dataclass
+class _Stream:
+    name: str
+    path: str
+    decode: Callable[[bytes], Any]
+    on_reading: Callable[[Any], None]
+    stats: StreamStats
+    task: Optional[asyncio.Task] = None
+    token: Optional[str] = None     # token the live connection was opened with
+
+
+class WSStreamManager:
+    """Owns all eMS Home WebSocket streams for one hub.
+
+    Register each data-transfer path with a decoder and a callback, then
+    start().  Failures on any stream grow a shared backoff, so a device
+    that drops off the network is not hammered by every stream at once;
+    each reconnect waits a random ("full jitter") delay up to that bound.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        token: str,
+        recorder: Optional[CaptureWriter] = None,
+        metrics: Optional[EMSHomeMetrics] = None,
+        handshake_limit: Optional[asyncio.Semaphore] = None,
+    ) -> None:
+        self._host = host
+        self._port = port
+        self._token = token
+        self._recorder = recorder
+        self._metrics = metrics
+        self._handshake_limit = (
+            handshake_limit if handshake_limit is not None else contextlib.nullcontext()
+        )
+        self._streams: dict[str, _Stream] = {}
+        self._running = False
+        self._failures = 0
+
+    def register(
+        self,
+        name: str,
+        path: str,
+        decode: Callable[[bytes], Any],
+        on_reading: Callable[[Any], None],
+    ) -> None:
+        """Subscribe to *path*; decoded non-None frames go to *on_reading*."""
+        if name in self._streams:
+            raise ValueError(f"Stream {name!r} is already registered")
+        stream = _Stream(name, path, decode, on_reading, StreamStats())
+        self._streams[name] = stream
+        if self._running:
+            self._spawn(stream)
+
+    def update_token(self, token: str) -> None:
+        """Use *token* for the next (re)connect of every stream."""
+        self._token = token
+
+    async def rotate_token(self, token: str) -> None:
+        """Switch to *token* and move live connections onto it.
+
+        Streams are reconnected one at a time and without backoff, so at
+        most one stream is briefly without data and the old token is
+        released before it expires.
+        """
+        self._token = token
+        for stream in list(self._streams.values()):
+            if not self._running or stream.task is None or stream.token in (None, token):
+                continue
+            stream.task.cancel()
+            try:
+                await stream.task
+            except asyncio.CancelledError:
+                pass
+            stream.task = None
+            if self._running:
+                stream.stats.reconnects += 1
+                self._spawn(stream)
+
+    @property
+    def stats(self) -> dict[str, StreamStats]:
+        return {name: s.stats for name, s in self._streams.items()}
+
+    async def start(self) -> None:
+        self._running = True
+        for stream in self._streams.values():
+            if stream.task is None:
+                self._spawn(stream)
+
+    async def stop(self) -> None:
+        self._running = False
+        tasks = [s.task for s in self._streams.values() if s.task]
+        for task in tasks:
+            task.cancel()
+        for stream in self._streams.values():
+            if stream.task:
+                try:
+                    await stream.task
+                except asyncio.CancelledError:
+                    pass
+                stream.task = None
+            stream.stats.state = STATE_STOPPED
+
+    def _spawn(self, stream: _Stream) -> None:
+        stream.task = asyncio.create_task(
+            self._run_loop(stream), name=f"ems_home_ws_{stream.name}"
+        )
+
+    def _backoff_delay(self) -> float:
+        bound = min(_BACKOFF_BASE * 2 ** min(self._failures, 16), _BACKOFF_MAX)
+        return random.uniform(_BACKOFF_BASE / 2, bound)
+
+    async def _run_loop(self, stream: _Stream) -> None:
+        stats = stream.stats
+        while self._running:
+            try:
+                stats.state = STATE_CONNECTING
+                await self._connect_and_listen(stream)
+            except asyncio.CancelledError:
+                break
+            except Exception as exc:
+                stats.last_error = str(exc)
+                self._failures += 1
+            else:
+                stats.last_error = None
+            if not self._running:
+                break
+            stats.state = STATE_BACKOFF
+            stats.reconnects += 1
+            delay = self._backoff_delay()
+            _LOGGER.warning(
+                "%s WebSocket error (%s), reconnecting in %.1fs",
+                stream.name, stats.last_error or "closed", delay,
+            )
+            await asyncio.sleep(delay)
+        stats.state = STATE_STOPPED
+
+    async def _connect_and_listen(self, stream: _Stream) -> None:
+        stats = stream.stats
+        token = self._token
+        async with self._handshake_limit:
+            try:
+                async with asyncio.timeout(_HANDSHAKE_TIMEOUT):
+                    conn = await _ws_open(self._host, self._port, stream.path, token)
+            except TimeoutError as exc:
+                # A normal connect failure: goes through the shared backoff
+                raise ConnectionError(
+                    f"WebSocket handshake timed out after {_HANDSHAKE_TIMEOUT:g}s"
+                ) from exc
+        stream.token = token
+        _LOGGER.info("%s WebSocket connected", stream.name)
+        stats.state = STATE_CONNECTED
+        stats.connects += 1
+        stats.connected_since = time.monotonic()
+        self._failures = 0
+        conn.send_text(f"Bearer {token}")
+        await conn.drain()
+        decode, on_reading = stream.decode, stream.on_reading
+        recorder = self._recorder
+        metrics = self._metrics.stream(stream.name) if self._metrics else None
+        try:
+            while self._running:
+                payload = await conn.recv()
+                if recorder is not None:
+                    recorder.append(stream.name, payload)
+                stats.frames += 1
+                stats.last_frame_at = now = time.monotonic()
+                reading = decode(payload)
+                if metrics is not None:
+                    metrics.decode.add(time.monotonic() - now)
+                    metrics.frame_rate.add(now)
+                if reading is not None:
+                    on_reading(reading)
+                else:
+                    stats.decode_failures += 1
+        finally:
+            stream.token = None
+            await conn.close()
@@ -0,0 +1,267 @@
+#!/usr/bin/env python3
+"""
+Fleet load test: many simulated eMS Home hubs behind one EMSHomeFleet.
+
+For every fleet size, starts that many simulator units and, per hub,
+logs in, opens the smart meter and EVSE streams and polls the three HTTP
+endpoints every --interval seconds, shifted once to its fleet poll
+phase the way the coordinator does (fleet.phased_interval).  All hubs
+share one EMSHomeFleet: one aiohttp connection pool and fleet-wide caps
+on in-flight requests and WebSocket handshakes.
+
+Reported per size: setup time, CPU per hub, frames and polls per hub and
+second, poll latency and the most polls started in any 100 ms tick.  The
+simulators run in the same process, so CPU covers both ends.  The run
+exits non-zero when per-hub CPU at the largest size exceeds the lowest
+per-hub CPU of any size by more than --tolerance, when the hubs fall
+behind their frame rate, or when they start fewer polls than their
+phased schedules put in the measured window.
+
+    python tools/load_test.py
+    python tools/load_test.py --sizes 10,50,100 --duration 30
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import simulator  # noqa: E402
+
+_sm = simulator.load_integration_module("smart_meter_ws")
+_evse = simulator.load_integration_module("evse_ws")
+_fleet = simulator.load_integration_module("fleet")
+
+DEFAULT_SIZES = "1,10,25,50,75"
+DEFAULT_TOLERANCE = 0.50
+TICK = 0.1                      # seconds, bucket for the poll burst metric
+MIN_RATE = 0.8                  # fraction of the nominal frame/poll rate a hub must reach
+
+
+@dataclass
+class HubCounters:
+    phase: float = 0.0
+    frames: int = 0
+    poll_starts: list[float] = field(default_factory=list)
+    poll_latencies: list[float] = field(default_factory=list)
+
+
+@dataclass
+class SizeResult:
+    hubs: int
+    setup_s: float
+    cpu_ms_per_hub_s: float
+    frames_per_hub_s: float
+    polls_per_hub_s: float
+    expected_polls_per_hub_s: float
+    poll_p50_ms: float
+    poll_p95_ms: float
+    peak_polls_per_tick: int
+
+
+async def _run_hub(
+    fleet, sim: simulator.EMSHomeSimulator, interval: float, phase: float,
+    counters: HubCounters, ready: asyncio.Event, stop: asyncio.Event,
+) -> None:
+    loop = asyncio.get_running_loop()
+    client = fleet.create_client("127.0.0.1", sim.config.password, port=sim.port)
+    streams = None
+    try:
+        await client.login()
+
+        def on_reading(_reading) -> None:
+            counters.frames += 1
+
+        streams = fleet.create_streams("127.0.0.1", sim.port, client.token)
+        streams.register("smart_meter", _sm.WS_PATH, _sm.decode_smart_meter_frame, on_reading)
+        streams.register("evse", _evse.WS_EVSE_PATH, _evse.decode_evse_frame, on_reading)
+        await streams.start()
+        while counters.frames == 0:     # both ends of the handshake done
+            await asyncio.sleep(0.05)
+        ready.set()
+
+        # First poll right away, then one phased gap, then every interval
+        next_poll = loop.time()
+        gap = _fleet.phased_interval(interval, phase)
+        while not stop.is_set():
+            try:
+                await asyncio.wait_for(stop.wait(), max(next_poll - loop.time(), 0))
+                break
+            except asyncio.TimeoutError:
+                pass
+            start = loop.time()
+            counters.poll_starts.append(start)
+            await asyncio.gather(
+                client.get_device_status(),
+                client.get_emobility_state(),
+                client.get_charge_mode(),
+            )
+            counters.poll_latencies.append(loop.time() - start)
+            next_poll = start + gap
+            gap = interval
+    finally:
+        if streams is not None:
+            await streams.stop()
+        await client.close()
+
+
+def _scheduled_polls(counters: HubCounters, interval: float, t0: float, t1: float) -> int:
+    """Polls the coordinator's schedule starts within [t0, t1) for one hub.
+
+    Counted from the hub's actual first poll.  A poll due in the last tick
+    may legitimately start after t1 and is not expected.
+    """
+    if not counters.poll_starts:
+        return 0
+    end = t1 - TICK
+    due = counters.poll_starts[0]
+    count = int(t0 <= due < end)
+    due += _fleet.phased_interval(interval, counters.phase)
+    while due < end:
+        count += due >= t0
+        due += interval
+    return count
+
+
+def _percentile(values: list[float], q: float) -> float:
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(int(q / 100 * len(values)), len(values) - 1)]
+
+
+async def run_size(hubs: int, args: argparse.Namespace) -> SizeResult:
+    config = simulator.SimulatorConfig(
+        smart_meter_rate=args.frame_rate, evse_rate=args.frame_rate / 5
+    )
+    sims = [simulator.EMSHomeSimulator(config) for _ in range(hubs)]
+    for sim in sims:
+        await sim.start()
+    fleet = _fleet.EMSHomeFleet()
+    loop = asyncio.get_running_loop()
+    stop = asyncio.Event()
+    counters = [HubCounters(phase=fleet.join(f"hub{i}")) for i in range(hubs)]
+    readies = [asyncio.Event() for _ in sims]
+    started = loop.time()
+    tasks = [
+        asyncio.create_task(_run_hub(
+            fleet, sim, args.interval, counters[i].phase, counters[i], readies[i], stop,
+        ))
+        for i, sim in enumerate(sims)
+    ]
+    try:
+        await asyncio.wait_for(
+            asyncio.gather(*(r.wait() for r in readies)), timeout=30 + hubs
+        )
+        setup = loop.time() - started
+
+        frames0 = sum(c.frames for c in counters)
+        t0, cpu0 = loop.time(), time.process_time()
+        await asyncio.sleep(args.duration)
+        t1, cpu1 = loop.time(), time.process_time()
+        frames = sum(c.frames for c in counters) - frames0
+    finally:
+        stop.set()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await fleet.close()
+        for sim in sims:
+            await sim.stop()
+
+    starts = [s for c in counters for s in c.poll_starts if t0 <= s < t1]
+    latencies = [
+        lat for c in counters
+        for s, lat in zip(c.poll_starts, c.poll_latencies) if t0 <= s < t1
+    ]
+    ticks: dict[int, int] = {}
+    for s in starts:
+        tick = int((s - t0) / TICK)
+        ticks[tick] = ticks.get(tick, 0) + 1
+    hub_seconds = hubs * (t1 - t0)
+    return SizeResult(
+        hubs=hubs,
+        setup_s=setup,
+        cpu_ms_per_hub_s=(cpu1 - cpu0) * 1e3 / hub_seconds,
+        frames_per_hub_s=frames / hub_seconds,
+        polls_per_hub_s=len(starts) / hub_seconds,
+        expected_polls_per_hub_s=sum(
+            _scheduled_polls(c, args.interval, t0, t1) for c in counters
+        ) / hub_seconds,
+        poll_p50_ms=_percentile(latencies, 50) * 1e3,
+        poll_p95_ms=_percentile(latencies, 95) * 1e3,
+        peak_polls_per_tick=max(ticks.values(), default=0),
+    )
+
+
+def check(results: list[SizeResult], args: argparse.Namespace) -> list[str]:
+    """Return a description of every scaling or throughput failure."""
+    failures = []
+    cheapest = min(results, key=lambda r: r.cpu_ms_per_hub_s)
+    last = results[-1]
+    growth = last.cpu_ms_per_hub_s / cheapest.cpu_ms_per_hub_s - 1
+    if growth > args.tolerance:
+        failures.append(
+            f"CPU per hub grew {growth:+.0%} from {cheapest.hubs} to {last.hubs} hubs"
+        )
+    nominal_frames = args.frame_rate * 1.2      # smart meter + EVSE at a fifth of it
+    for r in results:
+        if r.frames_per_hub_s < nominal_frames * MIN_RATE:
+            failures.append(f"{r.hubs} hubs: {r.frames_per_hub_s:.2f} frames/hub/s")
+        if r.polls_per_hub_s < r.expected_polls_per_hub_s * MIN_RATE:
+            failures.append(
+                f"{r.hubs} hubs: {r.polls_per_hub_s:.3f} polls/hub/s,"
+                f" {r.expected_polls_per_hub_s:.3f} scheduled"
+            )
+    return failures
+
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument("--sizes", default=DEFAULT_SIZES,
+                   help=f"comma separated fleet sizes (default {DEFAULT_SIZES})")
+    p.add_argument("--duration", type=float, default=15.0,
+                   help="measured seconds per size")
+    p.add_argument("--interval", type=float, default=5.0,
+                   help="HTTP poll interval per hub (s)")
+    p.add_argument("--frame-rate", type=float, default=2.0,
+                   help="smart meter frames per second per hub (EVSE: a fifth)")
+    p.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE,
+                   help="allowed growth of CPU per hub (default 0.50)")
+    return p.parse_args(argv)
+
+
+def main(argv=None) -> int:
+    args = _parse_args(argv)
+    logging.basicConfig(level=logging.ERROR)
+    sizes = [int(s) for s in args.sizes.split(",")]
+
+    print(
+        f"  {'hubs':>5} {'setup s':>8} {'cpu ms/hub/s':>13} {'frames/hub/s':>13}"
+        f" {'polls/hub/s':>12} {'poll p50 ms':>12} {'poll p95 ms':>12} {'peak/tick':>10}"
+    )
+    results = []
+    for hubs in sizes:
+        r = asyncio.run(run_size(hubs, args))
+        results.append(r)
+        print(
+            f"  {r.hubs:>5} {r.setup_s:>8.2f} {r.cpu_ms_per_hub_s:>13.3f} {r.frames_per_hub_s:>13.2f}"
+            f" {r.polls_per_hub_s:>12.3f} {r.poll_p50_ms:>12.1f} {r.poll_p95_ms:>12.1f}"
+            f" {r.peak_polls_per_tick:>10}"
+        )
+
+    failures = check(results, args)
+    if failures:
+        for failure in failures:
+            print(f"FAILED: {failure}")
+        return 1
+    print(f"Scaled linearly from {results[0].hubs} to {results[-1].hubs} hubs")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
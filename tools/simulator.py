@@ -0,0 +1,532 @@
+#!/usr/bin/env python3
+"""
+Local eMS Home device simulator (HTTP + WebSocket) for testing and load.
+
+Implements the parts of the eMS Home web API used by the integration:
+
+    POST /api/web-login/token                  OAuth2 password grant
+    GET  /api/device-settings/devicestatus
+    GET  /api/e-mobility/state
+    GET  /api/e-mobility/config/chargemode
+    PUT  /api/e-mobility/config/chargemode
+    WS   /api/data-transfer/ws/protobuf/gdr/local/values/smart-meter
+    WS   /api/data-transfer/ws/protobuf/gdr/local/values/+/evse
+
+Frame rates, latency and faults (401s, dropped sockets, slow responses)
+are configurable, and frames recorded with the integration's capture log
+can be replayed instead of synthetic ones.  Stdlib only; run
+
+    python tools/simulator.py --port 8080 --password secret
+
+or embed EMSHomeSimulator in an asyncio test/benchmark.
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import importlib
+import json
+import logging
+import math
+import os
+import random
+import secrets
+import struct
+import sys
+import time
+import types
+from dataclasses import dataclass, field
+from typing import Optional
+from urllib.parse import parse_qs
+
+_LOGGER = logging.getLogger("ems_home_sim")
+
+_INTEGRATION_DIR = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "custom_components", "ems_home"
+)
+
+
+def load_integration_module(name: str):
+    """Import a stdlib-only integration module without Home Assistant.
+
+    The package __init__ pulls in homeassistant, so register a bare
+    namespace for it and import the submodule directly.
+    """
+    if "ems_home" not in sys.modules:
+        pkg = types.ModuleType("ems_home")
+        pkg.__path__ = [os.path.normpath(_INTEGRATION_DIR)]
+        sys.modules["ems_home"] = pkg
+    return importlib.import_module(f"ems_home.{name}")
+
+
+_sm = load_integration_module("smart_meter_ws")
+_evse = load_integration_module("evse_ws")
+
+_WS_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+# ---------------------------------------------------------------------------
+# Protobuf / WebSocket encoding
+# ---------------------------------------------------------------------------
+
+def _varint(n: int) -> bytes:
+    out = bytearray()
+    while True:
+        b = n & 0x7F
+        n >>= 7
+        if n:
+            out.append(b | 0x80)
+        else:
+            out.append(b)
+            return bytes(out)
+
+
+def _field_varint(fn: int, value: int) -> bytes:
+    return _varint(fn << 3) + _varint(value)
+
+
+def _field_bytes(fn: int, value: bytes) -> bytes:
+    return _varint(fn << 3 | 2) + _varint(len(value)) + value
+
+
+def _timestamp(ts: float) -> bytes:
+    sec = int(ts)
+    return _field_bytes(3, _field_varint(1, sec) + _field_varint(2, int((ts - sec) * 1e9)))
+
+
+def encode_smart_meter_frame(values: dict[str, float], ts: float, uuid: str) -> bytes:
+    """Encode reading-field values (engineering units) as a smart meter frame."""
+    body = bytearray(_timestamp(ts))
+    for ch_id, spec in _sm.SMART_METER_CHANNELS.items():
+        raw = max(int(round(values.get(spec.field, 0.0) * spec.divisor)), 0)
+        body += _field_bytes(4, _field_varint(1, ch_id) + _field_varint(2, raw))
+    return _field_bytes(1, _field_bytes(1, uuid.encode()) + _field_bytes(2, bytes(body)))
+
+
+def encode_evse_frame(
+    props: dict[str, int | str], ts: float, uuid: str,
+    values: Optional[dict[str, float]] = None,
+) -> bytes:
+    """Encode named EVSE properties (ints or strings) as an EVSE frame.
+
+    *values* are EVSEReading channel fields in engineering units, sent as
+    field 4 channel data; channels missing from it are not sent.
+    """
+    body = bytearray(_timestamp(ts))
+    if values is not None:
+        for ch_id, spec in _evse.EVSE_CHANNELS.items():
+            if spec.field not in values:
+                continue
+            raw = max(int(round(values[spec.field] * spec.divisor)), 0)
+            body += _field_bytes(4, _field_varint(1, ch_id) + _field_varint(2, raw))
+    for name, value in props.items():
+        if isinstance(value, str):
+            v = _field_bytes(2, value.encode())
+        else:
+            v = _field_varint(1, value)
+        body += _field_bytes(5, _field_bytes(1, name.encode()) + _field_bytes(2, v))
+    return _field_bytes(1, _field_bytes(1, uuid.encode()) + _field_bytes(2, bytes(body)))
+
+
+def encode_ws_frame(payload: bytes, opcode: int = 0x2) -> bytes:
+    """Unmasked server-to-client frame."""
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", 0x80 | opcode, n)
+    elif n < 0x10000:
+        header = struct.pack("!BBH", 0x80 | opcode, 126, n)
+    else:
+        header = struct.pack("!BBQ", 0x80 | opcode, 127, n)
+    return header + payload
+
+
+async def _read_client_frame(reader) -> tuple[int, bytes]:
+    b0, b1 = await reader.readexactly(2)
+    n = b1 & 0x7F
+    if n == 126:
+        n = struct.unpack("!H", await reader.readexactly(2))[0]
+    elif n == 127:
+        n = struct.unpack("!Q", await reader.readexactly(8))[0]
+    key = await reader.readexactly(4) if b1 & 0x80 else b"\0\0\0\0"
+    data = await reader.readexactly(n)
+    return b0 & 0x0F, bytes(b ^ key[i % 4] for i, b in enumerate(data))
+
+
+# ---------------------------------------------------------------------------
+# Simulated device
+# ---------------------------------------------------------------------------
+
+@dataclass
+class SimulatorConfig:
+    password: str = "secret"
+    token_ttl: int = 604800             # seconds, reported as expires_in
+    smart_meter_rate: float = 1.0       # frames per second
+    evse_rate: float = 0.2              # frames per second
+    latency: float = 0.0                # added to every HTTP response (s)
+    slow_rate: float = 0.0              # probability of an extra slow delay
+    slow_delay: float = 5.0             # seconds
+    unauthorized_rate: float = 0.0      # probability a valid token gets 401
+    drop_after: float = 0.0             # close WS sockets after N s (0 = never)
+    replay_dir: Optional[str] = None    # capture log directory to replay
+    replay_speed: float = 1.0           # 2.0 = twice as fast as recorded
+    etags: bool = False                 # send ETags and honour If-None-Match
+
+
+@dataclass
+class SimulatorStats:
+    logins: int = 0
+    requests: dict[str, int] = field(default_factory=dict)
+    unauthorized: int = 0
+    ws_connections: int = 0
+    ws_frames: int = 0
+    ws_drops: int = 0
+
+
+class EMSHomeSimulator:
+    """One simulated eMS Home unit listening on *host*:*port*."""
+
+    def __init__(
+        self, config: Optional[SimulatorConfig] = None,
+        host: str = "127.0.0.1", port: int = 0,
+    ) -> None:
+        self.config = config or SimulatorConfig()
+        self.stats = SimulatorStats()
+        self._host = host
+        self._port = port
+        self._server: Optional[asyncio.AbstractServer] = None
+        self._handlers: set[asyncio.Task] = set()
+        self._tokens: dict[str, float] = {}
+        self._uuid = secrets.token_hex(8)
+        self._rng = random.Random()
+        self._started = time.monotonic()
+        self.charge_mode = {
+            "mode": "grid",
+            "mincharginpowerquota": None,
+            "minpvpowerquota": 0,
+            "lastminchargingpowerquota": 0,
+            "lastminpvpowerquota": 100,
+        }
+        self.evse_status = 1
+
+    @property
+    def port(self) -> int:
+        return self._server.sockets[0].getsockname()[1] if self._server else self._port
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(self._handle, self._host, self._port)
+        _LOGGER.info("eMS Home simulator listening on %s:%d", self._host, self.port)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            for task in list(self._handlers):
+                task.cancel()
+            await asyncio.gather(*self._handlers, return_exceptions=True)
+            await self._server.wait_closed()
+            self._server = None
+
+    def revoke_tokens(self) -> None:
+        """Invalidate all issued tokens (next request gets 401)."""
+        self._tokens.clear()
+
+    # -- synthetic measurements -------------------------------------------
+
+    def _charging_power_w(self, t: float) -> float:
+        return 11000.0 if self.evse_status == 4 else 0.0
+
+    def smart_meter_values(self, t: float) -> dict[str, float]:
+        base = 800 + 600 * math.sin(t / 60) + self._rng.uniform(-50, 50)
+        phases = [max(base / 3 + self._rng.uniform(-30, 30), 0) for _ in range(3)]
+        values = {
+            "power_total": sum(phases) + self._charging_power_w(t),
+            "power_l1": phases[0], "power_l2": phases[1], "power_l3": phases[2],
+            "frequency": 50 + self._rng.uniform(-0.03, 0.03),
+            "energy_total": 12345.678 + (time.monotonic() - self._started) * 0.0003,
+            "power_factor": 0.95,
+        }
+        for i in (1, 2, 3):
+            values[f"voltage_l{i}"] = 230 + self._rng.uniform(-2, 2)
+            values[f"current_l{i}"] = phases[i - 1] / 230
+            values[f"apparent_l{i}"] = phases[i - 1] / 0.95
+            values[f"power_factor_l{i}"] = 0.95
+        values["power_apparent"] = values["power_total"] / 0.95
+        return values
+
+    def evse_props(self) -> dict[str, int | str]:
+        return {
+            "evse_status": self.evse_status,
+            "evse_session_duration": int(time.monotonic() - self._started),
+            "evse_serial": "SIM0000001",
+            "evse_hw_imax": 32000,
+            "evse_error_code": "",
+        }
+
+    def evse_values(self, t: float) -> dict[str, float]:
+        power = self._charging_power_w(t)
+        values = {"power_total": power, "energy_total": 2_500_000 + (time.monotonic() - self._started) * 0.1}
+        for i in (1, 2, 3):
+            values[f"power_l{i}"] = power / 3
+            values[f"current_l{i}"] = power / 3 / 230
+        return values
+
+    # -- connection handling ----------------------------------------------
+
+    async def _handle(self, reader, writer) -> None:
+        task = asyncio.current_task()
+        self._handlers.add(task)
+        try:
+            while True:
+                request = await self._read_request(reader)
+                if request is None:
+                    break
+                method, path, headers, body = request
+                if headers.get("upgrade", "").lower() == "websocket":
+                    await self._serve_ws(reader, writer, path, headers)
+                    break
+                await self._serve_http(writer, method, path, headers, body)
+        except (ConnectionError, asyncio.IncompleteReadError, asyncio.CancelledError):
+            pass
+        finally:
+            self._handlers.discard(task)
+            writer.close()
+
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.IncompleteReadError:
+            return None
+        lines = head.decode("latin-1").split("\r\n")
+        method, target, _ = lines[0].split(" ", 2)
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                k, v = line.split(":", 1)
+                headers[k.strip().lower()] = v.strip()
+        length = int(headers.get("content-length", 0) or 0)
+        body = await reader.readexactly(length) if length else b""
+        return method.upper(), target.split("?", 1)[0], headers, body
+
+    def _authorized(self, headers: dict) -> bool:
+        auth = headers.get("authorization", "")
+        token = auth[7:] if auth.startswith("Bearer ") else None
+        if token is None or self._tokens.get(token, 0) < time.time():
+            return False
+        if self._rng.random() < self.config.unauthorized_rate:
+            self._tokens.pop(token, None)
+            return False
+        return True
+
+    async def _serve_http(self, writer, method, path, headers, body) -> None:
+        cfg = self.config
+        self.stats.requests[f"{method} {path}"] = (
+            self.stats.requests.get(f"{method} {path}", 0) + 1
+        )
+        delay = cfg.latency
+        if cfg.slow_rate and self._rng.random() < cfg.slow_rate:
+            delay += cfg.slow_delay
+        if delay:
+            await asyncio.sleep(delay)
+
+        status, payload = 404, {"error": "not found"}
+        if path == "/api/web-login/token" and method == "POST":
+            form = parse_qs(body.decode())
+            if form.get("password", [""])[0] == cfg.password:
+                token = secrets.token_urlsafe(24)
+                self._tokens[token] = time.time() + cfg.token_ttl
+                self.stats.logins += 1
+                status, payload = 200, {
+                    "access_token": token, "token_type": "bearer",
+                    "expires_in": cfg.token_ttl,
+                }
+            else:
+                status, payload = 401, {"error": "invalid_grant"}
+        elif not self._authorized(headers):
+            self.stats.unauthorized += 1
+            status, payload = 401, {"error": "unauthorized"}
+        elif path == "/api/device-settings/devicestatus" and method == "GET":
+            status, payload = 200, {
+                "status": "idle", "CpuLoad": self._rng.randint(5, 40), "CpuTemp": 48,
+                "RamFree": 120_000, "RamTotal": 256_000,
+                "FlashAppFree": 50_000, "FlashAppTotal": 100_000,
+                "FlashDataFree": 400_000, "FlashDataTotal": 1_000_000,
+            }
+        elif path == "/api/e-mobility/state" and method == "GET":
+            p = self._charging_power_w(time.time()) * 1000   # mW
+            status, payload = 200, {
+                "EvChargingPower": {"total": p, "l1": p / 3, "l2": p / 3, "l3": p / 3},
+                "CurtailmentSetpoint": {"total": 0, "l1": 0, "l2": 0, "l3": 0},
+                "OverloadProtectionActive": False,
+            }
+        elif path == "/api/e-mobility/config/chargemode":
+            if method == "PUT":
+                update = json.loads(body or b"{}")
+                self.charge_mode.update(update)
+                if update.get("minpvpowerquota"):
+                    self.charge_mode["lastminpvpowerquota"] = update["minpvpowerquota"]
+                status, payload = 200, {}
+            else:
+                status, payload = 200, dict(self.charge_mode)
+
+        data = json.dumps(payload).encode()
+        extra = ""
+        if cfg.etags and status == 200 and method == "GET":
+            etag = '"%s"' % hashlib.sha1(data).hexdigest()[:16]
+            extra = f"ETag: {etag}\r\n"
+            if headers.get("if-none-match") == etag:
+                status, data = 304, b""
+        reason = {200: "OK", 304: "Not Modified", 401: "Unauthorized", 404: "Not Found"}[status]
+        writer.write(
+            f"HTTP/1.1 {status} {reason}\r\n"
+            f"Content-Type: application/json\r\n"
+            f"Content-Length: {len(data)}\r\n{extra}"
+            f"Connection: keep-alive\r\n\r\n".encode() + data
+        )
+        await writer.drain()
+
+    async def _serve_ws(self, reader, writer, path, headers) -> None:
+        if not self._authorized(headers):
+            self.stats.unauthorized += 1
+            writer.write(b"HTTP/1.1 401 Unauthorized\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+            return
+        if path == _sm.WS_PATH:
+            stream = "smart_meter"
+        elif path == _evse.WS_EVSE_PATH:
+            stream = "evse"
+        else:
+            writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\n\r\n")
+            await writer.drain()
+            return
+        accept = base64.b64encode(hashlib.sha1(
+            (headers.get("sec-websocket-key", "") + _WS_GUID).encode()
+        ).digest()).decode()
+        writer.write(
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {accept}\r\n\r\n".encode()
+        )
+        await writer.drain()
+        self.stats.ws_connections += 1
+
+        sender = asyncio.create_task(self._send_stream(writer, stream))
+        try:
+            # Consume client frames (auth text, pongs, close)
+            while not sender.done():
+                opcode, data = await _read_client_frame(reader)
+                if opcode == 0x8:
+                    writer.write(encode_ws_frame(data[:2], opcode=0x8))
+                    await writer.drain()
+                    break
+                if opcode == 0x9:
+                    writer.write(encode_ws_frame(data, opcode=0xA))
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            sender.cancel()
+            try:
+                await sender
+            except (asyncio.CancelledError, ConnectionError):
+                pass
+
+    async def _send_stream(self, writer, stream: str) -> None:
+        cfg = self.config
+        deadline = time.monotonic() + cfg.drop_after if cfg.drop_after else None
+        frames = self._replay(stream) if cfg.replay_dir else self._synthetic(stream)
+        async for payload in frames:
+            if deadline is not None and time.monotonic() >= deadline:
+                self.stats.ws_drops += 1
+                writer.transport.abort()
+                return
+            writer.write(encode_ws_frame(payload))
+            await writer.drain()
+            self.stats.ws_frames += 1
+
+    async def _synthetic(self, stream: str):
+        rate = self.config.smart_meter_rate if stream == "smart_meter" else self.config.evse_rate
+        interval = 1.0 / rate if rate > 0 else None
+        if interval is None:
+            await asyncio.Event().wait()
+        next_at = time.monotonic()
+        while True:
+            now = time.time()
+            if stream == "smart_meter":
+                yield encode_smart_meter_frame(self.smart_meter_values(now), now, self._uuid)
+            else:
+                yield encode_evse_frame(
+                    self.evse_props(), now, self._uuid, self.evse_values(now)
+                )
+            next_at += interval
+            await asyncio.sleep(max(next_at - time.monotonic(), 0))
+
+    async def _replay(self, stream: str):
+        capture = load_integration_module("capture")
+        speed = self.config.replay_speed or 1.0
+        first = None
+        start = time.monotonic()
+        for rec in capture.iter_capture(self.config.replay_dir, stream=stream):
+            if first is None:
+                first = rec.timestamp
+            wait = (rec.timestamp - first) / speed - (time.monotonic() - start)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            yield rec.payload
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _parse_args(argv=None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8080)
+    p.add_argument("--hubs", type=int, default=1,
+                   help="number of simulated units on consecutive ports")
+    p.add_argument("--password", default="secret")
+    p.add_argument("--token-ttl", type=int, default=604800)
+    p.add_argument("--smart-meter-rate", type=float, default=1.0)
+    p.add_argument("--evse-rate", type=float, default=0.2)
+    p.add_argument("--latency", type=float, default=0.0)
+    p.add_argument("--slow-rate", type=float, default=0.0)
+    p.add_argument("--slow-delay", type=float, default=5.0)
+    p.add_argument("--unauthorized-rate", type=float, default=0.0)
+    p.add_argument("--drop-after", type=float, default=0.0)
+    p.add_argument("--replay", dest="replay_dir")
+    p.add_argument("--replay-speed", type=float, default=1.0)
+    p.add_argument("--etags", action="store_true",
+                   help="send ETags and answer conditional GETs with 304")
+    p.add_argument("-v", "--verbose", action="store_true")
+    return p.parse_args(argv)
+
+
+async def _main(args: argparse.Namespace) -> None:
+    config = SimulatorConfig(
+        password=args.password, token_ttl=args.token_ttl,
+        smart_meter_rate=args.smart_meter_rate, evse_rate=args.evse_rate,
+        latency=args.latency, slow_rate=args.slow_rate, slow_delay=args.slow_delay,
+        unauthorized_rate=args.unauthorized_rate, drop_after=args.drop_after,
+        replay_dir=args.replay_dir, replay_speed=args.replay_speed,
+        etags=args.etags,
+    )
+    sims = [
+        EMSHomeSimulator(config, args.host, args.port + i if args.port else 0)
+        for i in range(args.hubs)
+    ]
+    for sim in sims:
+        await sim.start()
+    try:
+        await asyncio.Event().wait()
+    finally:
+        for sim in sims:
+            await sim.stop()
+
+
+if __name__ == "__main__":
+    _args = _parse_args()
+    logging.basicConfig(level=logging.DEBUG if _args.verbose else logging.INFO)
+    try:
+        asyncio.run(_main(_args))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,276 @@
+#!/usr/bin/env python3
+"""
+Protocol checks for the integration's WebSocket client (ws_stream).
+
+Runs WSConnection against a local stand-in server that speaks raw
+RFC 6455 frames and verifies:
+
+    * 7-bit, 16-bit and 64-bit payload lengths
+    * fragmented messages with pings interleaved between the fragments,
+      answered with pongs carrying the ping payload
+    * every client frame is masked, with a fresh mask key per frame
+    * a server close is echoed with the same status code
+    * a client close completes when the server echoes it
+    * frames arriving in the same segment as the 101 response
+
+Stdlib only; exits non-zero if any check fails.
+
+    python tools/ws_check.py
+"""
+from __future__ import annotations
+
+import asyncio
+import os
+import struct
+import sys
+import time
+from typing import Awaitable, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import simulator  # noqa: E402
+
+_ws = simulator.load_integration_module("ws_stream")
+
+TIMEOUT = 5.0
+_UPGRADE_RESPONSE = (
+    b"HTTP/1.1 101 Switching Protocols\r\n"
+    b"Upgrade: websocket\r\n"
+    b"Connection: Upgrade\r\n\r\n"
+)
+
+ServerFn = Callable[[asyncio.StreamReader, asyncio.StreamWriter], Awaitable[None]]
+ClientFn = Callable[["_ws.WSConnection"], Awaitable[None]]
+
+
+class CheckFailed(AssertionError):
+    pass
+
+
+def _expect(condition: bool, message: str) -> None:
+    if not condition:
+        raise CheckFailed(message)
+
+
+# ---------------------------------------------------------------------------
+# Stand-in server side
+# ---------------------------------------------------------------------------
+
+def server_frame(payload: bytes, opcode: int = _ws.OP_BINARY, fin: bool = True) -> bytes:
+    """Unmasked server-to-client frame with the shortest length encoding."""
+    b0 = (0x80 if fin else 0) | opcode
+    n = len(payload)
+    if n < 126:
+        header = struct.pack("!BB", b0, n)
+    elif n < 0x10000:
+        header = struct.pack("!BBH", b0, 126, n)
+    else:
+        header = struct.pack("!BBQ", b0, 127, n)
+    return header + payload
+
+
+async def read_client_frame(reader: asyncio.StreamReader) -> tuple[bool, int, bytes, bytes]:
+    """Read one client frame; fails unless it is masked.  Returns (fin, opcode, payload, mask)."""
+    b0, b1 = await reader.readexactly(2)
+    _expect(bool(b1 & 0x80), f"client frame (opcode {b0 & 0x0F}) is not masked")
+    length = b1 & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    mask = await reader.readexactly(4)
+    data = await reader.readexactly(length)
+    payload = bytes(b ^ mask[i % 4] for i, b in enumerate(data))
+    return bool(b0 & 0x80), b0 & 0x0F, payload, mask
+
+
+async def run_scenario(server_fn: ServerFn, client_fn: ClientFn, initial: bytes = b"") -> None:
+    """Upgrade one connection, then run both sides; *initial* follows the 101."""
+    loop = asyncio.get_running_loop()
+    server_done: asyncio.Future = loop.create_future()
+
+    async def handle(reader, writer):
+        try:
+            await reader.readuntil(b"\r\n\r\n")
+            writer.write(_UPGRADE_RESPONSE + initial)
+            await writer.drain()
+            await server_fn(reader, writer)
+            server_done.set_result(None)
+        except Exception as exc:
+            if not server_done.done():
+                server_done.set_exception(exc)
+        finally:
+            writer.close()
+
+    server = await asyncio.start_server(handle, "127.0.0.1", 0)
+    port = server.sockets[0].getsockname()[1]
+    conn = None
+    try:
+        conn = await asyncio.wait_for(_ws._ws_open("127.0.0.1", port, "/check", "token"), TIMEOUT)
+        await asyncio.wait_for(client_fn(conn), TIMEOUT)
+        await asyncio.wait_for(server_done, TIMEOUT)
+    finally:
+        if conn is not None:
+            conn._writer.close()
+        server.close()
+        await server.wait_closed()
+
+
+# ---------------------------------------------------------------------------
+# Checks
+# ---------------------------------------------------------------------------
+
+# 7-bit (<126), 16-bit (126..65535) and 64-bit (>65535) length encodings
+LENGTHS = (0, 125, 126, 65535, 65536, 300_000)
+
+
+async def check_lengths() -> None:
+    messages = [bytes((i * 31 + n) % 256 for i in range(n)) for n in LENGTHS]
+
+    async def server(reader, writer):
+        for msg in messages:
+            writer.write(server_frame(msg))
+        await writer.drain()
+
+    async def client(conn):
+        for msg in messages:
+            got = await conn.recv()
+            _expect(got == msg, f"{len(msg)}-byte message came back as {len(got)} bytes")
+
+    await run_scenario(server, client)
+
+
+async def check_fragmentation_with_pings() -> None:
+    parts = [b"frag-one|", os.urandom(70_000), b"|frag-three"]
+    pings = [b"ping-1", b"", b"ping-3"]
+
+    async def server(reader, writer):
+        writer.write(server_frame(parts[0], _ws.OP_BINARY, fin=False))
+        writer.write(server_frame(pings[0], _ws.OP_PING))
+        writer.write(server_frame(parts[1], _ws.OP_CONTINUATION, fin=False))
+        writer.write(server_frame(pings[1], _ws.OP_PING))
+        writer.write(server_frame(pings[2], _ws.OP_PING))
+        writer.write(server_frame(parts[2], _ws.OP_CONTINUATION, fin=True))
+        writer.write(server_frame(b"after", _ws.OP_TEXT))
+        await writer.drain()
+        for ping in pings:
+            fin, opcode, payload, _ = await read_client_frame(reader)
+            _expect(opcode == _ws.OP_PONG, f"expected pong, got opcode {opcode}")
+            _expect(fin, "pong is fragmented")
+            _expect(payload == ping, f"pong payload {payload!r} does not echo ping {ping!r}")
+
+    async def client(conn):
+        got = await conn.recv()
+        _expect(got == b"".join(parts), "fragmented message reassembled incorrectly")
+        _expect(await conn.recv() == b"after", "message after the fragments lost")
+
+    await run_scenario(server, client)
+
+
+async def check_client_masking() -> None:
+    texts = ["Bearer token", "x" * 200, "y" * 70_000]
+
+    async def server(reader, writer):
+        masks = []
+        for text in texts:
+            fin, opcode, payload, mask = await read_client_frame(reader)
+            _expect(opcode == _ws.OP_TEXT, f"expected text frame, got opcode {opcode}")
+            _expect(payload == text.encode(), "masked payload does not decode to the text sent")
+            masks.append(mask)
+        _expect(len(set(masks)) == len(masks), "mask key reused between frames")
+
+    async def client(conn):
+        for text in texts:
+            conn.send_text(text)
+        await conn.drain()
+
+    await run_scenario(server, client)
+
+
+async def check_server_close_echo() -> None:
+    async def server(reader, writer):
+        writer.write(server_frame(b"last", _ws.OP_BINARY))
+        writer.write(server_frame(struct.pack("!H", 1001) + b"going away", _ws.OP_CLOSE))
+        await writer.drain()
+        _, opcode, payload, _ = await read_client_frame(reader)
+        _expect(opcode == _ws.OP_CLOSE, f"expected close echo, got opcode {opcode}")
+        _expect(payload[:2] == struct.pack("!H", 1001), f"close echo carries {payload[:2]!r}")
+
+    async def client(conn):
+        _expect(await conn.recv() == b"last", "message before the close lost")
+        try:
+            await conn.recv()
+        except _ws.WSClosedError as exc:
+            _expect(exc.code == 1001, f"close code {exc.code}, expected 1001")
+        else:
+            raise CheckFailed("recv() returned after a close frame")
+
+    await run_scenario(server, client)
+
+
+async def check_client_close() -> None:
+    async def server(reader, writer):
+        _, opcode, payload, _ = await read_client_frame(reader)
+        _expect(opcode == _ws.OP_CLOSE, f"expected close, got opcode {opcode}")
+        _expect(payload == struct.pack("!H", 1000), f"close payload {payload!r}")
+        writer.write(server_frame(payload, _ws.OP_CLOSE))
+        await writer.drain()
+
+    async def client(conn):
+        start = time.monotonic()
+        await conn.close(1000)
+        elapsed = time.monotonic() - start
+        _expect(elapsed < _ws._CLOSE_TIMEOUT / 2, f"close() took {elapsed:.2f}s despite the echo")
+
+    await run_scenario(server, client)
+
+
+async def check_frames_with_handshake() -> None:
+    first = server_frame(b"in-handshake-segment")
+    # Second message split so its header arrives with the 101 response
+    second = server_frame(os.urandom(1000))
+
+    async def server(reader, writer):
+        writer.write(second[8:])
+        await writer.drain()
+
+    async def client(conn):
+        _expect(await conn.recv() == b"in-handshake-segment", "frame sent with the 101 lost")
+        _expect(await conn.recv() == second[4:], "frame split across the 101 segment corrupted")
+
+    await run_scenario(server, client, initial=first + second[:8])
+
+
+CHECKS: dict[str, Callable[[], Awaitable[None]]] = {
+    "payload lengths (7/16/64-bit)": check_lengths,
+    "fragmentation with interleaved pings": check_fragmentation_with_pings,
+    "client frames masked": check_client_masking,
+    "server close echoed": check_server_close_echo,
+    "client close handshake": check_client_close,
+    "frames in the handshake segment": check_frames_with_handshake,
+}
+
+
+async def _run_all() -> int:
+    failures = 0
+    for name, check in CHECKS.items():
+        try:
+            await check()
+        except Exception as exc:
+            failures += 1
+            print(f"  FAIL  {name}: {type(exc).__name__}: {exc}")
+        else:
+            print(f"  ok    {name}")
+    return failures
+
+
+def main() -> int:
+    failures = asyncio.run(_run_all())
+    if failures:
+        print(f"{failures} check(s) failed")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())